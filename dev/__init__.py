@@ -1,2 +1,10 @@
-from .dev import Dev
 
+# Dev is imported lazily so that `import dev` (and tools importing dev.utils) stay cheap
+
+__all__ = ['Dev']
+
+def __getattr__(name):
+    if name == 'Dev':
+        from .dev import Dev
+        return Dev
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from .utils import abspath, ensure_directory_exists
+
+class Cache:
+    """
+    Persistent key/value cache stored in a single SQLite file.
+
+    Values are JSON-serialized. Entries expire after `ttl` seconds and the
+    least recently used entries are evicted once the cache holds more than
+    `max_entries` entries or `max_bytes` bytes. Safe to share between threads.
+    """
+
+    def __init__(self,
+                 path: str = '~/.commune/dev_cache/cache.sqlite',
+                 ttl: Optional[float] = None,
+                 max_entries: int = 10000,
+                 max_bytes: int = 256_000_000):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Path to the SQLite file
+            ttl: Time-to-live of an entry in seconds (None for no expiry)
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total size of the stored values in bytes
+        """
+        self.path = abspath(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.counts = {'hits': 0, 'misses': 0, 'puts': 0, 'evictions': 0}
+        self.lock = threading.Lock()
+        ensure_directory_exists(os.path.dirname(self.path))
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, size INTEGER, created REAL, accessed REAL)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """
+        Build a stable cache key from any JSON-serializable parts.
+        """
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a value, or default if it is missing or expired.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute('SELECT value, created FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self.conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.counts['misses'] += 1
+                return default
+            self.conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+            self.counts['hits'] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> Dict[str, Any]:
+        """
+        Store a value, evicting the least recently used entries if the cache is full.
+        """
+        data = json.dumps(value)
+        now = time.time()
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)', (key, data, len(data), now, now))
+            self.counts['puts'] += 1
+            self.evict()
+        return {'status': 'success', 'key': key, 'size': len(data)}
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used ones until under the caps.
+        """
+        n = 0
+        if self.ttl is not None:
+            n += self.conn.execute('DELETE FROM cache WHERE created < ?', (time.time() - self.ttl,)).rowcount
+        count, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        while count > self.max_entries or size > self.max_bytes:
+            batch = max(count - self.max_entries, 1)
+            rows = self.conn.execute('SELECT key, size FROM cache ORDER BY accessed LIMIT ?', (batch,)).fetchall()
+            if not rows:
+                break
+            self.conn.executemany('DELETE FROM cache WHERE key = ?', [(r[0],) for r in rows])
+            count -= len(rows)
+            size -= sum(r[1] for r in rows)
+            n += len(rows)
+        self.counts['evictions'] += n
+        return n
+
+    def delete(self, key: str) -> bool:
+        with self.lock:
+            return self.conn.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def clear(self) -> Dict[str, Any]:
+        with self.lock:
+            self.conn.execute('DELETE FROM cache')
+        return {'status': 'success', 'path': self.path}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report size and hit/miss counts since construction.
+        """
+        with self.lock:
+            count, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        lookups = self.counts['hits'] + self.counts['misses']
+        return {
+            'entries': count,
+            'bytes': size,
+            **self.counts,
+            'hit_rate': self.counts['hits'] / lookups if lookups else 0.0,
+        }
@@ -1,20 +1,29 @@
 
-import commune as c
 import time
+import functools
 import os
 import glob
 import re
-import json
 from pathlib import Path
 from typing import Dict, List, Union, Optional, Any, Tuple
 from .utils import *
+from .index import RepoIndex
+from .tokens import count_tokens, plan_context
+from .parse import StreamParser
+from .execute import Executor
+from .repomap import RepoMap
+from .snippets import extract_snippets, changed_lines, render_context
 
-print = c.print
+c = lazy_import('commune')
+
+def print(*args, **kwargs):
+    return c.print(*args, **kwargs)
 
 class Dev:
 
     start_anchor = '<START_JSON>'
     end_anchor = '</END_JSON>'
+    bytes_per_token = 8  # generous upper bound, used to stop reading files that cannot fit the context budget
 
     prompt= """
                 --GOAL--
@@ -30,6 +39,11 @@ class Dev:
 
                 --CONTEXT--
                 PATH/PWD={path}
+                EACH CONTEXT FILE STARTS WITH A '--- PATH' LINE. A FILE WITH '@@ START-END @@' HEADERS IS ONLY PARTIALLY SHOWN:
+                EACH HEADER IS FOLLOWED BY LINES START TO END OF THE FILE AND THE LINES BETWEEN EXCERPTS ARE LEFT OUT.
+                '@@ outline @@' LISTS ONLY THE FILE'S DEF AND CLASS LINES AND '(summary)' MARKS A SUMMARY, NOT CODE.
+                NEVER REWRITE A PARTIALLY SHOWN FILE WITH create_file, THAT WOULD DROP THE LINES YOU CANNOT SEE;
+                EDIT IT WITH insert_text, COPYING THE ANCHORS FROM THE SHOWN CODE, NEVER FROM THE '---' OR '@@' HEADER LINES
                 CONTEXT={context}
                 QUERY={query} # THE QUERY YOU ARE TRYING TO ANSWER
 
@@ -49,11 +63,45 @@ class Dev:
                  cache_dir: str = '~/.commune/dev_cache',
                  **kwargs):
 
-        self.model = c.module(model)(**kwargs)
+        # the model, file selector and tools are only loaded when first used
+        self.model_path = model
+        self.model_kwargs = kwargs
         self.cache_dir = abspath(cache_dir)
-        self.memory = c.module('dev.tool.select_files')()
-        self.tools = self.ta = c.module('dev.tool')().tool2schema()
         ensure_directory_exists(self.cache_dir)
+        self.index = RepoIndex(cache_dir=self.cache_dir)
+
+    @functools.cached_property
+    def model(self):
+        return c.module(self.model_path)(**self.model_kwargs)
+
+    @functools.cached_property
+    def memory(self):
+        return c.module('dev.tool.select_files')(cache_dir=self.cache_dir)
+
+    @functools.cached_property
+    def toolbox(self):
+        return c.module('dev.tool')(cache_dir=self.cache_dir)
+
+    @functools.cached_property
+    def tools(self):
+        return self.toolbox.tool2schema()
+
+    @property
+    def ta(self):
+        return self.tools
+
+    def repo_map(self, path: str = './', update: bool = False, **kwargs) -> RepoMap:
+        """
+        Get the repo map (file -> summaries) of a directory.
+        
+        Args:
+            path: Directory the map covers
+            update: Whether to (incrementally) summarize the files that changed first
+            **kwargs: Passed to Summarize.summarize_dir
+        """
+        if update:
+            c.module('dev.tool.summarize')(cache_dir=self.cache_dir).summarize_dir(path, **kwargs)
+        return RepoMap(path, self.cache_dir)
         
     def forward(self, 
                 text: str = '', 
@@ -66,12 +114,41 @@ class Dev:
                 verbose: bool = True,
                 mode: str = 'auto', 
                 max_age= 10000,
+                context_ratio: float = 0.5,
+                execute: Optional[bool] = None,
+                use_map: bool = True,
+                snippets: bool = True,
+                snippet_tokens: int = 2000,
+                outline_tokens: int = 2000,
                 **kwargs) -> Dict[str, str]:
-        context = {f: get_text(f) for f in self.memory.forward(options= c.files( abspath(path)), query=text)}
+        options = self.index.files(path)
+        files = self.memory.forward(options=options, query=text)
         query = self.preprocess(' '.join(list(map(str, [text] + list(extra_text)))))
+        # pack the selected files (most relevant first) into the share of the context window left for context
+        model = self.model.get_model(model)
+        overhead = count_tokens(self.prompt, model) + count_tokens(query, model) + count_tokens(str(self.tools), model)
+        budget = int(self.model.get_model_info(model)['context_length'] * context_ratio) - overhead
+        path2text = self.index.get_texts(files, max_bytes=budget * self.bytes_per_token, max_total_bytes=budget * self.bytes_per_token)
+        # large files are cut down to the line ranges relevant to the query or near uncommitted changes
+        if snippets:
+            path2text = extract_snippets(path2text, query, max_tokens=snippet_tokens, changed=changed_lines(path), model=model)
+        # with a repo map, files that do not fit are replaced by their summaries and the rest of the repo is outlined
+        repo_map = self.repo_map(path) if use_map else None
+        summarize = (lambda p, text, max_tokens: repo_map.text(p) or text) if repo_map and repo_map.files else None
+        plan = plan_context(path2text, budget=budget, model=model, summarize=summarize)
+        context = plan['context']
+        if summarize is not None:
+            # only files still in the tree, most relevant first, within a budget of their own
+            rest = [p for p in repo_map.rank(query, options) if p not in context]
+            outline = repo_map.render(rest, budget=min(outline_tokens, budget - plan['used']), model=model)
+            context = {**context, **{p: '(summary) ' + text for p, text in outline.items()}}
+        if verbose:
+            print('Index:', self.index.stats())
+            print('Context plan:', {'budget': plan['budget'], 'used': plan['used'], 'files': plan['plan'],
+                                    'summaries': len(context) - len(plan['context'])})
         prompt =self.prompt.format(
             path=path,
-            context=context,
+            context=render_context(context),
             query=query,
             tools=self.tools,
             start_anchor=self.start_anchor,
@@ -81,7 +158,7 @@ class Dev:
         # Generate the response
         output = self.model.forward(prompt, stream=stream, model=model, max_tokens=max_tokens, temperature=temperature )
         # Process the output
-        return self.postprocess(output)
+        return self.postprocess(output, execute=execute)
 
 
     def preprocess(self, text, threshold=1000):
@@ -125,44 +202,58 @@ class Dev:
         path = '~/.dev/test/add'
         return self.forward(text, to=path, verbose=True)
 
-    def postprocess(self, output):
+    def postprocess(self, output, execute: Optional[bool] = None, max_workers: int = 8):
         """
-        Postprocess tool outputs and extract fn calls.
+        Postprocess the streamed model output and extract the tool calls.
         
-        This fn parses the raw output text and identifies fn calls in the format:
-        <FN::function_name>param1</FN::function_name> or 
-        <FN::function_name><param_name>param_value</param_name></FN::function_name>
+        The output is parsed incrementally: the plan between the anchors
+        ({start_anchor}list[dict(fn:str, params:dict)]{end_anchor}) is parsed
+        element by element as it streams, so each call can be dispatched as soon
+        as it is complete. Calls run in parallel unless they touch the same path.
         
         Args:
-            output (str): The raw output from the model
+            output (Iterable[str]): The raw (streamed) output from the model
+            execute (bool, optional): True to run each call as soon as it is parsed,
+                False to never run them, None to ask once the plan is complete
+            max_workers (int): Number of calls run in parallel
                 
         Returns:
-            str: The processed output with extracted fn calls
+            dict: The parsed calls and, for the calls that were run, their
+                results and timings in plan order
         """
-        import re
-        
-        # Print the output character by character for streaming effect
-        text = ''
-        for ch in output: 
-            print(ch, end='')
-            text += ch
-        json_str = text.split(self.start_anchor)[1].split(self.end_anchor)[0]
-         
-        calls = json.loads(json_str)
-        # You can process the fn calls here or return them for further processing
-        print("Function calls detected:")
-        for call in calls:
-            print(f"Function: {call['fn']}, Parameters: {call['params']}")
-        # For debugging, you can add:
-        if input('Do you want to see the fn calls? (y/n): ').strip().lower() == 'y':
+        parser = StreamParser(self.start_anchor, self.end_anchor)
+        executor = Executor(self.execute, max_workers=max_workers)
+        try:
+            for ch in output:
+                print(ch, end='')
+                for call in parser.feed(ch):
+                    if execute:
+                        executor.submit(call)
+            calls = parser.close()
+            # You can process the fn calls here or return them for further processing
             print("Function calls detected:")
             for call in calls:
                 print(f"Function: {call['fn']}, Parameters: {call['params']}")
-                fn = c.module(call['fn'])()
-                fn.forward(**call['params'])
-                
+            if execute is None and input('Do you want to see the fn calls? (y/n): ').strip().lower() == 'y':
+                execute = True
+            if execute:
+                # calls only recovered by close() (a single object, an unterminated array) were not dispatched yet
+                for call in calls[len(executor.calls):]:
+                    executor.submit(call)
+            results = executor.results()
+        finally:
+            executor.close()
+        for r in results:
+            print(f"[{r['idx']}] {r['fn']} {'ok' if r['success'] else 'failed: ' + r['error']} ({r['time']:.2f}s)")
 
-            
         return {
-            "calls": calls
+            "calls": calls,
+            "results": results
         }
+
+    def execute(self, call: Dict[str, Any]) -> Any:
+        """
+        Run a single tool call from the plan.
+        """
+        print(f"Function: {call['fn']}, Parameters: {call['params']}")
+        return self.toolbox.get(call['fn']).forward(**call['params'])
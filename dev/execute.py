@@ -0,0 +1,109 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, List, Optional
+from .utils import abspath
+
+class Executor:
+    """
+    Runs the tool calls of a plan in parallel while respecting their dependencies.
+
+    Calls that touch the same path (or a path inside a directory another call
+    touches) run in plan order; calls on unrelated paths run concurrently on a
+    thread pool. Calls without a path parameter (e.g. shell commands) act as
+    barriers: they wait for every earlier call and every later call waits for them.
+    Calls can be submitted one by one as a plan streams in.
+    """
+
+    path_params = ['file_path', 'path', 'filepath', 'file']
+
+    def __init__(self, fn: Callable[[Dict[str, Any]], Any], max_workers: int = 8):
+        """
+        Initialize the executor.
+
+        Args:
+            fn: Function that runs a single call (dict(fn:str, params:dict))
+            max_workers: Number of calls run in parallel
+        """
+        self.fn = fn
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.calls = []  # [(call, target, future)] in plan order
+        self.reports = []
+
+    def target(self, call: Dict[str, Any]) -> Optional[str]:
+        """
+        The path a call touches, or None if it could touch anything.
+        """
+        params = call.get('params') or {}
+        for name in self.path_params:
+            if isinstance(params.get(name), str):
+                return abspath(params[name])
+        return None
+
+    @staticmethod
+    def conflicts(a: Optional[str], b: Optional[str]) -> bool:
+        if a is None or b is None:
+            return True
+        return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+    def submit(self, call: Dict[str, Any]) -> Future:
+        """
+        Schedule a call after every earlier call it conflicts with.
+
+        Args:
+            call: The call to run
+
+        Returns:
+            Future resolving to the call's report
+        """
+        idx = len(self.calls)
+        target = self.target(call)
+        deps = [future for _, t, future in self.calls if self.conflicts(target, t)]
+        # only a failed call on the same path skips this one, barriers just wait
+        same_path = [future for _, t, future in self.calls if None not in (target, t) and self.conflicts(target, t)]
+        # deps were submitted earlier to the same FIFO pool, so they are already running or done when this starts
+        future = self.pool.submit(self.run, idx, call, deps, same_path)
+        self.calls.append((call, target, future))
+        return future
+
+    def run(self, idx: int, call: Dict[str, Any], deps: List[Future], same_path: List[Future]) -> Dict[str, Any]:
+        report = {'idx': idx, 'fn': call.get('fn'), 'params': call.get('params'), 'success': False}
+        for dep in deps:
+            dep.result()
+        failed = [d.result()['idx'] for d in same_path if not d.result()['success']]
+        if failed:
+            report['error'] = f'skipped, depends on failed calls {failed}'
+            report['time'] = 0.0
+            return report
+        start = time.time()
+        try:
+            report['result'] = self.fn(call)
+            report['success'] = True
+        except Exception as e:
+            report['error'] = str(e)
+        report['time'] = time.time() - start
+        return report
+
+    def results(self) -> List[Dict[str, Any]]:
+        """
+        Wait for every submitted call and return their reports in plan order.
+        """
+        self.reports = [future.result() for _, _, future in self.calls]
+        return self.reports
+
+    def forward(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run a whole plan.
+
+        Args:
+            calls: List of dict(fn:str, params:dict)
+
+        Returns:
+            List of reports (idx, fn, params, success, result or error, time) in plan order
+        """
+        for call in calls:
+            self.submit(call)
+        return self.results()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
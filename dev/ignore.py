@@ -0,0 +1,131 @@
+import os
+import re
+import fnmatch
+from typing import List, Optional, Tuple
+
+def compile_patterns(patterns: Optional[List[str]]):
+    """
+    Compile fnmatch-style patterns into a single regex.
+
+    Args:
+        patterns: Glob patterns, e.g. ['*.pyc', '__pycache__']
+
+    Returns:
+        The compiled regex's match function, or None if there are no patterns
+    """
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{fnmatch.translate(p)})' for p in patterns)).match
+
+def translate(pattern: str) -> str:
+    """
+    Translate the body of a .gitignore pattern to a regex over '/'-separated relative paths.
+    """
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        ch = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif ch == '*':
+            out.append('[^/]*')
+            i += 1
+        elif ch == '?':
+            out.append('[^/]')
+            i += 1
+        elif ch == '[':
+            j = pattern.find(']', i + 2)
+            if j == -1:
+                out.append(re.escape(ch))
+                i += 1
+            else:
+                body = pattern[i + 1:j].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = j + 1
+        elif ch == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(ch))
+            i += 1
+    return ''.join(out)
+
+class GitIgnore:
+    """
+    Matcher for the patterns of one .gitignore file.
+
+    Supports comments, negation ('!'), directory-only patterns (trailing '/'),
+    anchored patterns (containing a '/') and '*', '?', '[...]' and '**' globs.
+    Paths are matched relative to the directory holding the .gitignore.
+    """
+
+    def __init__(self, lines: List[str], base: str = ''):
+        """
+        Initialize the matcher.
+
+        Args:
+            lines: Lines of the .gitignore file
+            base: Directory the patterns are relative to
+        """
+        self.base = base
+        self.rules = []  # [(regex, negate, dir_only)]
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            body = translate(line.lstrip('/'))
+            regex = re.compile(('' if anchored else '(?:.*/)?') + body + r'\Z', re.DOTALL)
+            self.rules.append((regex, negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional['GitIgnore']:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        ignore = cls(lines, base=os.path.dirname(path))
+        return ignore if ignore.rules else None
+
+    def match(self, path: str, is_dir: bool = False) -> Optional[bool]:
+        """
+        Check a path against the patterns, the last matching pattern wins.
+
+        Args:
+            path: Absolute path
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if ignored, False if re-included by a negation, None if no pattern matched
+        """
+        rel = os.path.relpath(path, self.base).replace(os.sep, '/')
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                result = not negate
+        return result
+
+def is_ignored(ignores: Tuple[GitIgnore, ...], path: str, is_dir: bool = False) -> bool:
+    """
+    Check a path against a stack of .gitignore matchers, deeper files take precedence.
+    """
+    for ignore in reversed(ignores):
+        result = ignore.match(path, is_dir)
+        if result is not None:
+            return result
+    return False
@@ -0,0 +1,205 @@
+import os
+import hashlib
+from typing import Dict, List, Optional, Any
+from .utils import abspath, ensure_directory_exists, calculate_file_hash, is_binary_file, save_json, load_json, read_text, walk_files
+
+class RepoIndex:
+    """
+    Persistent, content-hashed index of the files under one or more directories.
+
+    Entries are keyed by absolute path and validated by (mtime, size), falling back
+    to the SHA-256 content hash when only the mtime changed (e.g. after a checkout).
+    File text is read on demand and kept in memory until the file changes, so
+    repeated queries over the same tree only re-read the files that were edited.
+
+    Only the metadata is persisted (index.json: mtime, size, content hash and
+    whether the file is binary), so a fresh process lists files and detects
+    changes without sniffing or hashing them again. File text is not persisted:
+    a fresh process reads each file once, since a copy on disk would cost as
+    much to read as the file itself.
+    """
+
+    ignore_dirs = ['__pycache__', 'node_modules', 'venv', '.git']
+
+    def __init__(self, cache_dir: str = '~/.commune/dev_cache', max_size: int = 10_000_000):
+        """
+        Initialize the index.
+
+        Args:
+            cache_dir: Directory holding the persisted index (index.json)
+            max_size: Files larger than this (in bytes) are never read
+        """
+        self.cache_dir = abspath(cache_dir)
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self.max_size = max_size
+        self.entries = self.load()  # {path: {'mtime': float, 'size': int, 'hash': str, 'binary': bool}}
+        self.path2text = {}  # {path: text} for files read since their last change
+        self.dirty = False
+        self.counts = {'hits': 0, 'misses': 0, 'rehashed': 0, 'walks': 0}
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return load_json(self.index_path)
+        except Exception:
+            return {}
+
+    def save(self) -> Dict[str, Any]:
+        if self.dirty:
+            ensure_directory_exists(self.cache_dir)
+            save_json(self.entries, self.index_path)
+            self.dirty = False
+        return {'status': 'success', 'path': self.index_path, 'files': len(self.entries)}
+
+    def walk(self, path: str):
+        """
+        Yield (path, stat) for every file walk_files lists under path (so .gitignore
+        files are honoured), skipping hidden entries and ignored directories.
+        """
+        for file_path in walk_files(abspath(path), ignore_patterns=['.*'] + self.ignore_dirs):
+            try:
+                yield file_path, os.stat(file_path)
+            except OSError:
+                continue
+
+    def update(self, path: str, stat: os.stat_result) -> Dict[str, Any]:
+        """
+        Bring the entry for a single file up to date with its stat result.
+        """
+        entry = self.entries.get(path)
+        if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return entry
+        if entry is not None and entry['size'] == stat.st_size and entry.get('hash'):
+            # mtime moved but the size did not, so check whether the content really changed
+            self.counts['rehashed'] += 1
+            if calculate_file_hash(path) == entry['hash']:
+                entry['mtime'] = stat.st_mtime
+                self.dirty = True
+                return entry
+        self.path2text.pop(path, None)
+        entry = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'hash': None,
+            'binary': stat.st_size > self.max_size or is_binary_file(path),
+        }
+        self.entries[path] = entry
+        self.dirty = True
+        return entry
+
+    def files(self, path: str = './', include_binary: bool = False) -> List[str]:
+        """
+        List the candidate files under path.
+
+        Only stats the tree; files are not read unless they are new or changed
+        (in which case the first KB is sniffed once to detect binaries).
+
+        Args:
+            path: Directory to list
+            include_binary: Whether to include binary and oversized files
+
+        Returns:
+            Sorted list of absolute file paths
+        """
+        root = abspath(path)
+        if os.path.isfile(root):
+            return [root]
+        self.counts['walks'] += 1
+        seen = set()
+        for file_path, stat in self.walk(root):
+            seen.add(file_path)
+            self.update(file_path, stat)
+        prefix = root.rstrip(os.sep) + os.sep
+        for file_path in [p for p in self.entries if p.startswith(prefix) and p not in seen]:
+            del self.entries[file_path]
+            self.path2text.pop(file_path, None)
+            self.dirty = True
+        self.save()
+        return sorted(p for p in seen if include_binary or not self.entries[p]['binary'])
+
+    def get_text(self, path: str, max_bytes: Optional[int] = None) -> Optional[str]:
+        """
+        Get the text of a file, reading it from disk only if it changed since the last read.
+
+        Args:
+            path: Path to the file
+            max_bytes: Only read the head of files larger than this (the partial text is not cached)
+
+        Returns:
+            Text content of the file, or None if it is binary or unreadable
+        """
+        path = abspath(path)
+        if max_bytes is not None:
+            max_bytes = max(max_bytes, 0)
+        try:
+            entry = self.update(path, os.stat(path))
+        except OSError:
+            return None
+        if entry['binary']:
+            return None
+        if path in self.path2text:
+            self.counts['hits'] += 1
+            return self.head(self.path2text[path], max_bytes)
+        self.counts['misses'] += 1
+        if max_bytes is not None and entry['size'] > max_bytes:
+            try:
+                return read_text(path, max_bytes=max_bytes)
+            except (OSError, ValueError):
+                return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        entry['hash'] = hashlib.sha256(data).hexdigest()
+        self.dirty = True
+        text = data.decode('utf-8', errors='replace')
+        self.path2text[path] = text
+        return text
+
+    @staticmethod
+    def head(text: str, max_bytes: Optional[int] = None) -> str:
+        """
+        The longest prefix of text that is at most max_bytes long in UTF-8, without splitting a character.
+        """
+        if max_bytes is None or len(text) * 4 <= max_bytes:  # no character takes more than 4 bytes
+            return text
+        return text.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore')
+
+    def get_texts(self,
+                  paths: List[str],
+                  max_bytes: Optional[int] = None,
+                  max_total_bytes: Optional[int] = None) -> Dict[str, str]:
+        """
+        Map each path to its text, skipping binary or unreadable files.
+
+        Args:
+            paths: Files to read, in priority order
+            max_bytes: Maximum number of bytes read per file
+            max_total_bytes: Stop reading once this many bytes were read in total
+        """
+        path2text = {}
+        total = 0
+        for path in paths:
+            if max_total_bytes is not None and total >= max_total_bytes:
+                break
+            limit = max_bytes
+            if max_total_bytes is not None:
+                limit = max_total_bytes - total if limit is None else min(limit, max_total_bytes - total)
+            text = self.get_text(path, max_bytes=limit)
+            if text is not None:
+                path2text[path] = text
+                total += len(text.encode('utf-8'))
+        self.save()
+        return path2text
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report index size and hit/miss counts since construction.
+        """
+        reads = self.counts['hits'] + self.counts['misses']
+        return {
+            'files': len(self.entries),
+            'cached': len(self.path2text),
+            **self.counts,
+            'hit_rate': self.counts['hits'] / reads if reads else 0.0,
+        }
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import threading
+
+class ModelCatalog:
+    """
+    In-process catalog of the models served by an OpenRouter-compatible API.
+
+    The catalog is loaded once per (base_url, path) and shared by every client in
+    the process. Models are indexed by id, by provider prefix and by memoized
+    substring search, so resolving a model per request is a dictionary hit.
+    Once the catalog is older than `ttl` seconds it is refreshed in a background
+    thread while the current data keeps being served.
+    """
+
+    catalogs = {}  # {(base_url, path): ModelCatalog}
+    catalogs_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path: str, base_url: str, ttl: float = 86400) -> 'ModelCatalog':
+        """
+        Get the process-wide catalog for a base_url and cache path.
+        """
+        with cls.catalogs_lock:
+            key = (base_url, path)
+            if key not in cls.catalogs:
+                cls.catalogs[key] = cls(path, base_url, ttl=ttl)
+            return cls.catalogs[key]
+
+    def __init__(self, path: str, base_url: str, ttl: float = 86400):
+        """
+        Initialize the catalog.
+
+        Args:
+            path: Path of the models.json cache
+            base_url: API base url serving /models
+            ttl: Age in seconds after which the catalog is refreshed in the background
+        """
+        self.path = path
+        self.base_url = base_url
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self.loaded_at = None
+        self.index([])
+
+    def index(self, models: list):
+        id2info = {m['id']: m for m in models}
+        provider2ids = {}
+        for model_id in id2info:
+            provider2ids.setdefault(model_id.split('/')[0], []).append(model_id)
+        # swap in whole dicts so readers never see a half-built index
+        self.id2info, self.provider2ids, self.search2ids = id2info, provider2ids, {}
+
+    def fetch(self) -> list:
+        import requests
+        response = requests.get(self.base_url + '/models')
+        models = json.loads(response.text)['data']
+        dirpath = os.path.dirname(self.path)
+        if not os.path.exists(dirpath):
+            os.makedirs(dirpath)
+        with open(self.path, 'w') as f:
+            json.dump(models, f)
+        return models
+
+    def load(self, update: bool = False) -> 'ModelCatalog':
+        """
+        Load the catalog from disk, or from the API if there is no cached copy or update is set.
+        """
+        with self.lock:
+            models = []
+            if not update and os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    models = json.load(f)
+                if isinstance(models, str):
+                    models = json.loads(models)
+                self.loaded_at = os.path.getmtime(self.path)
+            if len(models) == 0:
+                models = self.fetch()
+                self.loaded_at = time.time()
+            self.index(models)
+        return self
+
+    def refresh(self):
+        try:
+            self.load(update=True)
+        except Exception as e:
+            # keep serving the current catalog and try again after another ttl
+            self.loaded_at = time.time()
+            print(f'Failed to refresh model catalog: {e}')
+        finally:
+            self.refreshing = False
+
+    def ensure(self):
+        """
+        Load on first use, and kick off a background refresh once the catalog is stale.
+        """
+        if self.loaded_at is None:
+            self.load()
+        elif self.ttl is not None and time.time() - self.loaded_at > self.ttl and not self.refreshing:
+            self.refreshing = True
+            threading.Thread(target=self.refresh, daemon=True).start()
+
+    def ids(self) -> list:
+        self.ensure()
+        return list(self.id2info.keys())
+
+    def info(self, model: str) -> dict:
+        self.ensure()
+        return self.id2info[model]
+
+    def search(self, search: str = None) -> list:
+        """
+        Ids of the models matching any of the comma-separated substrings in search.
+        """
+        self.ensure()
+        if search is None:
+            return list(self.id2info.keys())
+        if search not in self.search2ids:
+            terms = [s.strip() for s in search.split(',')]
+            self.search2ids[search] = [m for m in self.id2info if any(s in m for s in terms)]
+        return self.search2ids[search]
+
+    def resolve(self, model: str) -> str:
+        """
+        Resolve a model id, provider name or substring to a model id.
+        """
+        self.ensure()
+        model = str(model)
+        if model in self.id2info:
+            return model
+        if model in self.provider2ids:
+            return self.provider2ids[model][0]
+        first = model not in self.search2ids
+        models = self.search(model)
+        assert len(models) > 0, f'Model {model} not found'
+        if first:
+            print(f"Model {model} not found. Using {models} instead.")
+        return models[0]
@@ -0,0 +1,193 @@
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Any
+
+class KeyPool:
+    """
+    Rate-limit-aware scheduler over a set of API keys.
+
+    Each request is routed to the healthy key with the fewest requests in flight.
+    A key that answers 429 or 5xx is cooled down for its Retry-After period, or
+    with exponential backoff when the server does not say, and is skipped until
+    the cooldown ends. A key rejected as unauthorized (401 or 403) keeps failing,
+    so it is taken out of rotation for auth_backoff seconds instead. Pools are
+    shared per key set across the process so that in-flight counts cover every
+    client.
+    """
+
+    auth_statuses = (401, 403)
+
+    pools = {}  # {tuple(sorted(keys)): KeyPool}
+    pools_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, keys: List[str], **kwargs) -> 'KeyPool':
+        """
+        Get the process-wide pool for a set of keys.
+        """
+        with cls.pools_lock:
+            pool_key = tuple(sorted(set(keys)))
+            if pool_key not in cls.pools:
+                cls.pools[pool_key] = cls(keys, **kwargs)
+            return cls.pools[pool_key]
+
+    def __init__(self, keys: List[str], base_backoff: float = 1.0, max_backoff: float = 60.0, auth_backoff: float = 3600.0):
+        """
+        Initialize the pool.
+
+        Args:
+            keys: API keys to schedule over
+            base_backoff: Cooldown after the first failure without Retry-After, doubled per consecutive failure
+            max_backoff: Longest cooldown in seconds
+            auth_backoff: Cooldown of a key rejected as unauthorized (401 or 403)
+        """
+        assert len(keys) > 0, 'KeyPool needs at least one key'
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.auth_backoff = auth_backoff
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.key2state = {}
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str) -> Dict[str, Any]:
+        with self.lock:
+            if key not in self.key2state:
+                self.key2state[key] = {
+                    'inflight': 0,
+                    'requests': 0,
+                    'successes': 0,
+                    'errors': 0,
+                    'rate_limited': 0,
+                    'unauthorized': 0,
+                    'failures': 0,  # consecutive
+                    'cooldown_until': 0.0,
+                    'backoff': 0.0,  # total seconds spent cooling down
+                }
+            return self.key2state[key]
+
+    def try_acquire(self):
+        """
+        Reserve the least-loaded healthy key.
+
+        Returns:
+            Tuple of (key, 0) on success, or (None, seconds until a key recovers)
+        """
+        now = time.time()
+        with self.lock:
+            healthy = [k for k, s in self.key2state.items() if s['cooldown_until'] <= now]
+            if not healthy:
+                return None, min(s['cooldown_until'] for s in self.key2state.values()) - now
+            key = min(healthy, key=lambda k: (self.key2state[k]['inflight'], self.key2state[k]['failures'], self.key2state[k]['requests']))
+            state = self.key2state[key]
+            state['inflight'] += 1
+            state['requests'] += 1
+            return key, 0
+
+    def acquire(self) -> str:
+        """
+        Reserve a key, sleeping until one recovers if all are cooling down.
+        """
+        while True:
+            key, wait = self.try_acquire()
+            if key is not None:
+                return key
+            time.sleep(wait)
+
+    async def aacquire(self) -> str:
+        """
+        Reserve a key without blocking the event loop.
+        """
+        while True:
+            key, wait = self.try_acquire()
+            if key is not None:
+                return key
+            await asyncio.sleep(wait)
+
+    def release(self, key: str, status: Optional[int] = None, retry_after: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Return a key to the pool and record the outcome of its request.
+
+        Args:
+            key: Key returned by acquire
+            status: HTTP status of a failed request (None for success)
+            retry_after: Seconds the server asked us to wait, if any
+        """
+        with self.lock:
+            state = self.key2state[key]
+            state['inflight'] -= 1
+            if status is None:
+                state['successes'] += 1
+                state['failures'] = 0
+                return state
+            state['errors'] += 1
+            if status in self.auth_statuses:
+                state['unauthorized'] += 1
+                state['cooldown_until'] = max(state['cooldown_until'], time.time() + self.auth_backoff)
+                state['backoff'] += self.auth_backoff
+            elif self.retryable(status):
+                if status == 429:
+                    state['rate_limited'] += 1
+                state['failures'] += 1
+                backoff = retry_after if retry_after is not None else min(self.base_backoff * 2 ** (state['failures'] - 1), self.max_backoff)
+                state['cooldown_until'] = max(state['cooldown_until'], time.time() + backoff)
+                state['backoff'] += backoff
+            return state
+
+    @staticmethod
+    def retryable(status: int) -> bool:
+        return status == 429 or status >= 500
+
+    def failover(self, status: Optional[int]) -> bool:
+        """
+        Whether a request that failed with status should be retried on another key:
+        rate limits and server errors always, auth failures while a healthy key remains.
+        """
+        if status is None:
+            return False
+        if self.retryable(status):
+            return True
+        if status in self.auth_statuses:
+            now = time.time()
+            with self.lock:
+                return any(s['cooldown_until'] <= now for s in self.key2state.values())
+        return False
+
+    @staticmethod
+    def retry_after(headers) -> Optional[float]:
+        """
+        Parse a Retry-After header given in seconds or as an HTTP date.
+        """
+        value = (headers or {}).get('retry-after')
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except Exception:
+            return None
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Per-key and total throughput, error and backoff metrics.
+        """
+        now = time.time()
+        elapsed = max(now - self.started_at, 1e-9)
+        with self.lock:
+            keys = {
+                f'{k[:6]}...{k[-4:]}': {**s, 'healthy': s['cooldown_until'] <= now, 'cooldown_until': s['cooldown_until']}
+                for k, s in self.key2state.items()
+            }
+        total = {f: sum(s[f] for s in keys.values()) for f in ['inflight', 'requests', 'successes', 'errors', 'rate_limited', 'unauthorized', 'backoff']}
+        return {
+            'keys': keys,
+            **total,
+            'healthy': sum(s['healthy'] for s in keys.values()),
+            'throughput': total['successes'] / elapsed,
+        }
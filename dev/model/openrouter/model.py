@@ -1,11 +1,19 @@
 import os
 import json
 import random
-import requests
-import openai
-from dotenv import load_dotenv
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ...cache import Cache
+from ...tokens import count_tokens
+from .catalog import ModelCatalog
+from .pool import ClientPool
+from .keys import KeyPool
 
 class OpenRouter:
+
+    dotenv_loaded = False
+
     def __init__(
         self,
         api_key: str = 'OPENROUTER_API_KEY',
@@ -14,7 +22,13 @@ class OpenRouter:
         timeout: float = None,
         max_retries: int = 10,
         storage_path = '~/.deval/model/openrouter',
-        
+        cache: bool = False,
+        cache_ttl: float = None,
+        cache_size: int = 10000,
+        catalog_ttl: float = 86400,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 60,
         **kwargs
     ):
         """
@@ -25,8 +39,15 @@ class OpenRouter:
             api_key (API_KEY): The API key for authentication.
             base_url (str, optional): can be used for openrouter api calls
             timeout (float, optional): The timeout value for the client. Defaults to None.
-            max_retries (int, optional): The maximum number of retries for the client. Defaults to None.
+            max_retries (int, optional): The maximum number of retries, each routed to the least-loaded healthy key. Defaults to 10.
             storage_path (str, optional): The path to store the models. Defaults to '~/.val/model/openrouter'.
+            cache (bool, optional): Whether to cache completions under storage_path. Defaults to False.
+            cache_ttl (float, optional): Time-to-live of a cached completion in seconds. Defaults to None (no expiry).
+            cache_size (int, optional): Maximum number of cached completions. Defaults to 10000.
+            catalog_ttl (float, optional): Age in seconds after which the model catalog is refreshed in the background. Defaults to 86400.
+            max_connections (int, optional): Maximum connections in the shared HTTP pool. Defaults to 100.
+            max_keepalive (int, optional): Maximum idle keep-alive connections in the shared HTTP pool. Defaults to 20.
+            keepalive_expiry (float, optional): Seconds an idle keep-alive connection is kept open. Defaults to 60.
         """
         # Load environment variables from .env file in the current working directory
 
@@ -36,14 +57,15 @@ class OpenRouter:
         self.base_url = base_url
         self.api_key= self.get_api_key(api_key)
         self.default_model = default_model
+        self.catalog = ModelCatalog.shared(f'{self.storage_path}/models.json', self.base_url, ttl=catalog_ttl)
         # Use API key from parameters, or from environment variable, or from stored keys
 
-        self.client = openai.OpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key, 
-            timeout=timeout,
-            max_retries=max_retries,
-        )
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limits = dict(max_connections=max_connections, max_keepalive=max_keepalive, keepalive_expiry=keepalive_expiry)
+        # every stored key is scheduled, retries are done here (not by the client) so they can switch keys
+        self.key_pool = KeyPool.shared(self.keys() or [self.api_key])
+        self.cache = Cache(f'{self.storage_path}/cache.sqlite', ttl=cache_ttl, max_entries=cache_size) if cache else None
 
     def forward(
         self,
@@ -55,7 +77,7 @@ class OpenRouter:
         max_tokens: int = 10000000,
         temperature: float = 0,
         verbose: bool = False,
-
+        cache: bool = None,
         **kwargs
     ) -> str :
         """
@@ -67,10 +89,75 @@ class OpenRouter:
             stream (bool): Whether to stream the response or not.
             max_tokens (int): The maximum number of tokens to generate.
             temperature (float): The sampling temperature to use.
+            cache (bool): Whether to use the completion cache. Defaults to caching only
+                deterministic (temperature=0) requests when the cache is enabled.
 
         Returns:
         Generator[str] | str: A generator for streaming responses or the full streamed response.
         """
+        model, messages, max_tokens = self.prepare(message, *extra_text, history=history, model=model, max_tokens=max_tokens)
+        key = self.cache_key(model, messages, max_tokens, temperature, cache)
+        if key is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                return self.replay(text, verbose=verbose) if stream else text
+        result = self.create(model=model, 
+                             messages=messages, 
+                             stream= bool(stream),
+                             max_tokens = max_tokens, 
+                             temperature= temperature  )
+        if stream:
+            def stream_generator( result):
+                tokens = []
+                try:
+                    for token in result:
+                        token = token.choices[0].delta.content
+                        tokens.append(token)
+                        if verbose:
+                            print(token, end='', flush=True)
+                        yield token
+                except GeneratorExit:
+                    # the caller stopped early (e.g. at an anchor): never block it on the rest of the response,
+                    # finish reading in the background only if the full response is to be cached
+                    if key is None:
+                        self.close_stream(result)
+                    else:
+                        threading.Thread(target=self.drain, args=(result, tokens, key), daemon=True).start()
+                    raise
+                if key is not None:
+                    self.cache.put(key, ''.join(t for t in tokens if t))
+            return stream_generator(result)
+        else:
+            text = result.choices[0].message.content
+            if key is not None:
+                self.cache.put(key, text)
+            return text
+
+    @staticmethod
+    def close_stream(result):
+        close = getattr(result, 'close', None)
+        if close is not None:
+            close()
+
+    def drain(self, result, tokens: list, key: str):
+        """
+        Read the rest of a stream its caller stopped early, then cache the full response.
+        """
+        try:
+            tokens += [token.choices[0].delta.content for token in result]
+        except Exception:
+            return
+        finally:
+            self.close_stream(result)
+        self.cache.put(key, ''.join(t for t in tokens if t))
+
+    def prepare(self, message: str, *extra_text, history: list = None, model: str = None, max_tokens: int = 10000000):
+        """
+        Resolve the model, build the chat messages and clamp max_tokens to the context window.
+
+        Returns:
+            Tuple of (model, messages, max_tokens)
+        """
         model =  model or self.default_model
         message = str(message)
         if len(extra_text) > 0:
@@ -78,39 +165,221 @@ class OpenRouter:
         history = history or []
         model = self.get_model(model)
         model_info = self.get_model_info(model)
-        num_tokens = len(message)
-        max_tokens = min(max_tokens, model_info['context_length'] - num_tokens)
         messages = history.copy()
         messages.append({"role": "user", "content": message})
-        result = self.client.chat.completions.create(model=model, 
-                                                    messages=messages, 
-                                                    stream= bool(stream),
-                                                    max_tokens = max_tokens, 
-                                                    temperature= temperature  )
+        num_tokens = sum(count_tokens(m['content'], model) for m in messages)
+        max_tokens = min(max_tokens, model_info['context_length'] - num_tokens)
+        return model, messages, max_tokens
+
+    def cache_key(self, model: str, messages: list, max_tokens: int, temperature: float, cache: bool = None):
+        """
+        Cache key for a request, or None if the request should not be cached.
+        """
+        if self.cache is not None and (cache if cache is not None else temperature == 0):
+            return Cache.key(model, messages, max_tokens, temperature)
+        return None
+
+    @property
+    def client(self):
+        # clients (and their keep-alive connections) are shared by every instance in the process
+        return self.get_client(self.api_key)
+
+    def get_client(self, key: str):
+        return ClientPool.client(self.base_url, key, timeout=self.timeout, max_retries=0, **self.limits)
+
+    def get_async_client(self, key: str):
+        return ClientPool.async_client(self.base_url, key, timeout=self.timeout, max_retries=0, **self.limits)
+
+    @staticmethod
+    def error_status(e: Exception):
+        """
+        HTTP status and Retry-After of a failed request (connection errors count as 503).
+        """
+        import openai
+        if isinstance(e, openai.APIStatusError):
+            return e.status_code, KeyPool.retry_after(e.response.headers)
+        if isinstance(e, openai.APIConnectionError):
+            return 503, None
+        return None, None
+
+    def create(self, **params):
+        """
+        Create a chat completion on the least-loaded healthy key, retrying
+        rate limits, server and connection errors, and keys rejected as
+        unauthorized, on the next best key.
+        A streamed request holds its key until the stream ends or is closed (see held).
+        """
+        for attempt in range(self.max_retries + 1):
+            key = self.key_pool.acquire()
+            try:
+                result = self.get_client(key).chat.completions.create(**params)
+            except Exception as e:
+                status, retry_after = self.error_status(e)
+                self.key_pool.release(key, status=status or 400, retry_after=retry_after)
+                if not self.key_pool.failover(status) or attempt == self.max_retries:
+                    raise
+                continue
+            if params.get('stream'):
+                return self.held(result, key)
+            self.key_pool.release(key)
+            return result
+
+    def held(self, stream, key: str):
+        """
+        Iterate a streamed completion, keeping its key in flight until the stream
+        is exhausted, fails or is closed, so least-loaded selection sees it.
+        """
+        status = retry_after = None
+        try:
+            yield from stream
+        except Exception as e:
+            status, retry_after = self.error_status(e)
+            raise
+        finally:
+            self.close_stream(stream)
+            self.key_pool.release(key, status=status, retry_after=retry_after)
+
+    async def aheld(self, stream, key: str):
+        """
+        Asynchronous version of held.
+        """
+        status = retry_after = None
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            status, retry_after = self.error_status(e)
+            raise
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                await close()
+            self.key_pool.release(key, status=status, retry_after=retry_after)
+
+    async def acreate(self, **params):
+        """
+        Asynchronous version of create.
+        """
+        for attempt in range(self.max_retries + 1):
+            key = await self.key_pool.aacquire()
+            try:
+                result = await self.get_async_client(key).chat.completions.create(**params)
+            except Exception as e:
+                status, retry_after = self.error_status(e)
+                self.key_pool.release(key, status=status or 400, retry_after=retry_after)
+                if not self.key_pool.failover(status) or attempt == self.max_retries:
+                    raise
+                continue
+            if params.get('stream'):
+                return self.aheld(result, key)
+            self.key_pool.release(key)
+            return result
+
+    def metrics(self):
+        """
+        Throughput, error and backoff metrics of the key pool.
+        """
+        return self.key_pool.metrics()
+
+    async def aforward(
+        self,
+        message: str,
+        *extra_text,
+        history: list = None,
+        stream: bool = False,
+        model: str = None,
+        max_tokens: int = 10000000,
+        temperature: float = 0,
+        verbose: bool = False,
+        cache: bool = None,
+        **kwargs
+    ):
+        """
+        Asynchronous version of forward, backed by openai.AsyncOpenAI.
+
+        Returns:
+        AsyncGenerator[str] | str: An async generator for streaming responses or the full response.
+        """
+        model, messages, max_tokens = self.prepare(message, *extra_text, history=history, model=model, max_tokens=max_tokens)
+        key = self.cache_key(model, messages, max_tokens, temperature, cache)
+        if key is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                if stream:
+                    async def replay_generator(text):
+                        for token in self.replay(text, verbose=verbose):
+                            yield token
+                    return replay_generator(text)
+                return text
+        result = await self.acreate(model=model,
+                                    messages=messages,
+                                    stream=bool(stream),
+                                    max_tokens=max_tokens,
+                                    temperature=temperature)
         if stream:
-            def stream_generator( result):
-                for token in result:
+            async def stream_generator(result):
+                tokens = []
+                async for token in result:
                     token = token.choices[0].delta.content
+                    tokens.append(token)
                     if verbose:
                         print(token, end='', flush=True)
                     yield token
+                if key is not None:
+                    self.cache.put(key, ''.join(t for t in tokens if t))
             return stream_generator(result)
-        else:
-            return result.choices[0].message.content
+        text = result.choices[0].message.content
+        if key is not None:
+            self.cache.put(key, text)
+        return text
+
+    async def abatch_forward(self, prompts: list, concurrency: int = 8, timeout: float = None, return_exceptions: bool = False, **kwargs) -> list:
+        """
+        Run many non-streaming requests concurrently, at most `concurrency` at a time.
+
+        Args:
+            prompts (list): Messages to send, or dicts of aforward params (e.g. {'message': ..., 'model': ...}).
+            concurrency (int): Maximum number of requests in flight.
+            timeout (float): Per-request timeout in seconds.
+            return_exceptions (bool): Return failed requests as exceptions in place instead of raising.
+            **kwargs: Params shared by every request.
+
+        Returns:
+        list: The responses, in the same order as the prompts.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        async def call(prompt):
+            params = {**kwargs, **prompt} if isinstance(prompt, dict) else {**kwargs, 'message': prompt}
+            params['stream'] = False
+            async with semaphore:
+                return await asyncio.wait_for(self.aforward(**params), timeout)
+        return await asyncio.gather(*[call(p) for p in prompts], return_exceptions=return_exceptions)
+
+    def batch_forward(self, prompts: list, concurrency: int = 8, timeout: float = None, return_exceptions: bool = False, **kwargs) -> list:
+        """
+        Synchronous wrapper around abatch_forward.
+        """
+        coro = self.abatch_forward(prompts, concurrency=concurrency, timeout=timeout, return_exceptions=return_exceptions, **kwargs)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # already inside an event loop (e.g. a notebook), so run on a fresh loop in another thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    def replay(self, text: str, chunk_size: int = 64, verbose: bool = False):
+        """
+        Replay a cached completion as a stream of chunks.
+        """
+        for i in range(0, len(text), chunk_size):
+            token = text[i:i + chunk_size]
+            if verbose:
+                print(token, end='', flush=True)
+            yield token
         
     def get_model(self, model=None):
-        models =  self.models()
-        model = str(model)
-        if str(model) not in models:
-            if ',' in model:
-                models = [m for m in models if any([s in m for s in providers.split(',')])]
-            else:
-                models = [m for m in models if str(model) in m]
-            print(f"Model {model} not found. Using {models} instead.")
-            assert len(models) > 0
-            model = models[0]
-
-        return model
+        return self.catalog.resolve(model)
 
     def get_json(self, path, default=None , update=False):
         if not os.path.exists(path) and not update:
@@ -135,7 +404,10 @@ class OpenRouter:
         get the api keys
         """
         keys = self.get_json(self.api_key_path, [])
-        load_dotenv()
+        if not OpenRouter.dotenv_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            OpenRouter.dotenv_loaded = True
         if isinstance(api_key, str):
             env_dict = os.environ
             env_var_found = False
@@ -143,7 +415,7 @@ class OpenRouter:
                 env_var_found = True
                 # how to change the color of the text in the terminal
                 api_key = env_dict[api_key]
-            if env_var_found:
+            if env_var_found and api_key not in keys:
                 if save_key_if_not_found:
                     keys.append(api_key)
                     keys = list(set(keys))
@@ -192,28 +464,24 @@ class OpenRouter:
         keys.append(key)
         keys = list(set(keys))
         self.put_json(self.api_key_path, keys)
+        self.key_pool.add(key)
         return keys
 
     def resolve_path(self, path):
         return 
 
     def model2info(self, search: str = None, update=False):
-        path =  f'{self.storage_path}/models.json'
-        models = self.get_json(path, default={}, update=update)
-        if len(models) == 0:
-            response = requests.get(self.base_url + '/models')
-            models = json.loads(response.text)['data']
-            self.put_json(path, models)
-        models = self.filter_models(models, search=search)
-        return {m['id']:m for m in models}
+        if update:
+            self.catalog.load(update=True)
+        return {m: self.catalog.info(m) for m in self.catalog.search(search)}
     
     def models(self, search: str = None, update=False):
-        return list(self.model2info(search=search,  update=update).keys())
+        if update:
+            self.catalog.load(update=True)
+        return self.catalog.search(search)
 
     def get_model_info(self, model):
-        model = self.get_model(model)
-        model2info = self.model2info()
-        return model2info[model]
+        return self.catalog.info(self.get_model(model))
     
     @classmethod
     def filter_models(cls, models, search:str = None):
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import weakref
+
+class ClientPool:
+    """
+    Process-wide registry of OpenAI clients.
+
+    Every OpenRouter instance (one per Dev, Tool, Select, Summarize, Memory...)
+    asks the pool for its client, so all of them share one keep-alive HTTP
+    connection pool per (base_url, api_key) instead of opening new TLS
+    connections per instance. Async clients are pooled per event loop, since an
+    httpx async connection pool cannot outlive the loop it was created on.
+    """
+
+    clients = {}  # {(base_url, api_key, timeout, max_retries): openai.OpenAI}
+    async_clients = weakref.WeakKeyDictionary()  # {loop: {(base_url, api_key, timeout, max_retries): openai.AsyncOpenAI}}
+    lock = threading.Lock()
+
+    @staticmethod
+    def limits(max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 60):
+        import httpx
+        return httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_keepalive,
+                            keepalive_expiry=keepalive_expiry)
+
+    @classmethod
+    def client(cls,
+               base_url: str,
+               api_key: str,
+               timeout: float = None,
+               max_retries: int = 10,
+               **limits) -> 'openai.OpenAI':
+        """
+        Get the shared synchronous client for a base_url and api_key.
+
+        Args:
+            base_url: API base url
+            api_key: API key
+            timeout: Request timeout in seconds
+            max_retries: Retries done by the client itself
+            **limits: max_connections, max_keepalive and keepalive_expiry of the connection pool
+        """
+        import openai
+        key = (base_url, api_key, timeout, max_retries)
+        with cls.lock:
+            if key not in cls.clients:
+                cls.clients[key] = openai.OpenAI(
+                    base_url=base_url,
+                    api_key=api_key,
+                    timeout=timeout,
+                    max_retries=max_retries,
+                    http_client=openai.DefaultHttpxClient(limits=cls.limits(**limits)),
+                )
+            return cls.clients[key]
+
+    @classmethod
+    def async_client(cls,
+                     base_url: str,
+                     api_key: str,
+                     timeout: float = None,
+                     max_retries: int = 10,
+                     **limits) -> 'openai.AsyncOpenAI':
+        """
+        Get the shared asynchronous client for a base_url and api_key on the running event loop.
+        """
+        import openai
+        loop = asyncio.get_running_loop()
+        key = (base_url, api_key, timeout, max_retries)
+        with cls.lock:
+            clients = cls.async_clients.setdefault(loop, {})
+            if key not in clients:
+                clients[key] = openai.AsyncOpenAI(
+                    base_url=base_url,
+                    api_key=api_key,
+                    timeout=timeout,
+                    max_retries=max_retries,
+                    http_client=openai.DefaultAsyncHttpxClient(limits=cls.limits(**limits)),
+                )
+            return clients[key]
+
+    @classmethod
+    def clear(cls):
+        """
+        Close and forget the pooled synchronous clients.
+        """
+        with cls.lock:
+            for client in cls.clients.values():
+                client.close()
+            cls.clients.clear()
+            cls.async_clients = weakref.WeakKeyDictionary()
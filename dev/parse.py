@@ -0,0 +1,120 @@
+import json
+from typing import Any, List
+
+class StreamParser:
+    """
+    Incremental parser for a JSON array wrapped in anchors inside a token stream.
+
+    Feed it chunks as they arrive; it finds the start anchor on the fly and
+    returns each element of the array as soon as the element's closing bracket
+    has streamed in, so callers can act on it before the response is finished.
+    """
+
+    def __init__(self, start_anchor: str = '<START_JSON>', end_anchor: str = '</END_JSON>'):
+        """
+        Initialize the parser.
+
+        Args:
+            start_anchor: Text marking the start of the JSON array
+            end_anchor: Text marking the end of the JSON array
+        """
+        self.start_anchor = start_anchor
+        self.end_anchor = end_anchor
+        self.parts = []  # every chunk seen, joined lazily by text
+        self.state = 'search'  # search -> array -> done, or search -> block if the payload is not an array
+        self.window = ''  # tail of the stream that may still hold a partial start anchor
+        self.block = []  # chars after the start anchor, used as a fallback if streaming parsing fails
+        self.element = []  # chars of the element being parsed
+        self.depth = 0  # 1 inside the array, >1 inside a nested element
+        self.in_string = False
+        self.escape = False
+        self.items = []
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.parts)
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume a chunk of the stream.
+
+        Args:
+            chunk: Next piece of the stream
+
+        Returns:
+            Array elements completed by this chunk
+        """
+        if not chunk:
+            return []
+        self.parts.append(chunk)
+        if self.state == 'search':
+            self.window += chunk
+            if self.start_anchor not in self.window:
+                self.window = self.window[-(len(self.start_anchor) - 1):]
+                return []
+            chunk = self.window.split(self.start_anchor, 1)[1]
+            self.window = ''
+            self.state = 'array'
+        if self.state != 'array':
+            return []
+        items = []
+        for ch in chunk:
+            self.block.append(ch)
+            item = self.step(ch)
+            if item is not None:
+                items.append(item)
+            if self.state != 'array':
+                break
+        self.items += items
+        return items
+
+    def step(self, ch: str):
+        if self.depth == 0:
+            if ch == '[':
+                self.depth = 1
+            elif not ch.isspace():
+                self.state = 'block'  # not an array, left to close() to parse whole
+            return None
+        if self.in_string:
+            self.element.append(ch)
+            if self.escape:
+                self.escape = False
+            elif ch == '\\':
+                self.escape = True
+            elif ch == '"':
+                self.in_string = False
+            return None
+        if self.depth == 1 and ch in ',]':
+            # end of a scalar element (objects and arrays were already emitted when they closed)
+            if ch == ']':
+                self.state = 'done'
+            return self.pop()
+        self.element.append(ch)
+        if ch == '"':
+            self.in_string = True
+        elif ch in '[{':
+            self.depth += 1
+        elif ch in ']}':
+            self.depth -= 1
+            if self.depth == 1:
+                return self.pop()
+        return None
+
+    def pop(self):
+        text = ''.join(self.element).strip()
+        self.element = []
+        return json.loads(text) if text else None
+
+    def close(self) -> List[Any]:
+        """
+        Finish parsing and return every element of the array.
+
+        Falls back to parsing the whole anchored block at once if the stream
+        ended before the array was closed, or if the payload is not an array
+        (a single object is returned as a one-element list).
+        """
+        if self.state == 'done':
+            return self.items
+        block = ''.join(self.block) if self.block and self.state == 'array' else self.text.split(self.start_anchor)[-1]
+        result = json.loads(block.split(self.end_anchor)[0])
+        return result if isinstance(result, list) else [result]
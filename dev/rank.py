@@ -0,0 +1,212 @@
+import re
+import math
+import heapq
+import importlib.util
+from collections import Counter, OrderedDict
+from typing import Hashable, List, Optional, Tuple
+from .utils import lazy_import
+
+# the lexical ranker works without numpy, the vector ranker does not; numpy is
+# slow to import, so it is only imported once vectors are first computed
+np = lazy_import('numpy') if importlib.util.find_spec('numpy') else None
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens, breaking paths, snake_case and camelCase.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    text = re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', str(text))
+    return [t for t in re.split(r'[^a-zA-Z0-9]+', text.lower()) if len(t) > 1]
+
+class BM25:
+    """
+    Okapi BM25 over an in-memory corpus, backed by an inverted index.
+    """
+
+    def __init__(self, docs: List[str], k1: float = 1.5, b: float = 0.75, counts: Optional[List[Counter]] = None):
+        """
+        Index the documents.
+
+        Args:
+            docs: Documents to index
+            k1: Term frequency saturation
+            b: Length normalization
+            counts: Token counts of the documents, if already computed (docs are then not tokenized)
+        """
+        self.k1 = k1
+        self.b = b
+        counts = counts if counts is not None else [Counter(tokenize(doc)) for doc in docs]
+        self.n = len(counts)
+        self.lengths = []
+        self.postings = {}  # {term: [(doc_idx, tf)]}
+        for i, doc_counts in enumerate(counts):
+            self.lengths.append(sum(doc_counts.values()))
+            for term, tf in doc_counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        self.avg_length = (sum(self.lengths) / self.n) if self.n else 0
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, []))
+        return math.log(1 + (self.n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> List[float]:
+        """
+        Score every document against the query.
+        """
+        scores = [0.0] * self.n
+        for term in set(tokenize(query)):
+            idf = self.idf(term)
+            for i, tf in self.postings.get(term, []):
+                norm = 1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
+
+class HashedVectors:
+    """
+    Hashed character n-gram vectors, compared by cosine similarity with numpy.
+
+    A vector takes dim float32s (4 KB at the default 1024 buckets). Vectors of
+    documents given with a key are kept in the shared cache under that key, so
+    callers ranking the same files again (keyed by path, mtime and size) only
+    vectorize the files that changed.
+    """
+
+    version = 2  # bumped whenever the hashing changes, so persisted vectors are rebuilt
+
+    def __init__(self,
+                 docs: List[str] = None,
+                 dim: int = 1024,
+                 ngram: int = 3,
+                 keys: Optional[List[Hashable]] = None,
+                 cache: Optional['OrderedDict'] = None,
+                 cache_size: int = 20000):
+        """
+        Vectorize the documents.
+
+        Args:
+            docs: Documents to vectorize
+            dim: Number of hash buckets
+            ngram: Character n-gram size
+            keys: Optional cache key per document (None for documents not to cache)
+            cache: Cache of vectors by (key, dim, ngram), shared across instances
+            cache_size: Maximum number of cached vectors
+        """
+        assert np is not None, 'numpy is required for HashedVectors'
+        self.dim = dim
+        self.ngram = ngram
+        self.cache = cache
+        self.cache_size = cache_size
+        keys = keys or [None] * len(docs or [])
+        vectors = [self.cached(d, key) for d, key in zip(docs or [], keys)]
+        self.matrix = np.stack(vectors) if vectors else np.zeros((0, dim), dtype=np.float32)
+
+    def cached(self, text: str, key: Optional[Hashable] = None) -> 'np.ndarray':
+        if key is None or self.cache is None:
+            return self.vectorize(text)
+        key = (key, self.dim, self.ngram)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.cache[key] = self.vectorize(text)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+        return vector
+
+    def vectorize(self, text: str) -> 'np.ndarray':
+        # tokens are ascii, so the n-grams are hashed over the bytes in one pass of numpy
+        codes = np.frombuffer(' '.join(tokenize(text)).encode(), dtype=np.uint8).astype(np.uint64)
+        n = len(codes) - self.ngram + 1
+        if n <= 0:
+            return np.zeros(self.dim, dtype=np.float32)
+        grams = np.zeros(n, dtype=np.uint64)
+        for i in range(self.ngram):
+            grams = grams * np.uint64(257) + codes[i:i + n]
+        buckets = ((grams * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)) % np.uint64(self.dim)
+        vector = np.bincount(buckets.astype(np.intp), minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def scores(self, query: str) -> List[float]:
+        if len(self.matrix) == 0:
+            return []
+        return (self.matrix @ self.vectorize(query)).tolist()
+
+class Ranker:
+    """
+    Local, offline first-stage retriever.
+
+    Combines BM25 with (optionally) hashed n-gram vectors and returns the
+    top-k documents, so that an LLM only has to re-rank a short list.
+    """
+
+    def __init__(self, vectors: bool = True, vector_weight: float = 0.3, cache_size: int = 20000):
+        """
+        Initialize the ranker.
+
+        Args:
+            vectors: Whether to mix in hashed n-gram vector similarity (requires numpy)
+            vector_weight: Weight of the vector score against the BM25 score
+            cache_size: Maximum number of document vectors and token counts kept between calls (see forward's keys)
+        """
+        self.vectors = vectors and np is not None
+        self.vector_weight = vector_weight
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # {(key, dim, ngram): vector}
+        self.term_cache = OrderedDict()  # {key: token counts}
+        self.index = None  # (keys, BM25) of the last call, reused while the documents are unchanged
+
+    def terms(self, doc: str, key: Optional[Hashable] = None) -> Counter:
+        """
+        Token counts of a document, cached under its key.
+        """
+        if key is None:
+            return Counter(tokenize(doc))
+        counts = self.term_cache.get(key)
+        if counts is None:
+            counts = self.term_cache[key] = Counter(tokenize(doc))
+            while len(self.term_cache) > self.cache_size:
+                self.term_cache.popitem(last=False)
+        else:
+            self.term_cache.move_to_end(key)
+        return counts
+
+    @staticmethod
+    def normalize(scores: List[float]) -> List[float]:
+        top = max(scores) if scores else 0
+        return [s / top for s in scores] if top > 0 else scores
+
+    def forward(self, query: str, docs: List[str], k: int = 50, keys: Optional[List[Hashable]] = None) -> List[Tuple[int, float]]:
+        """
+        Rank documents against a query.
+
+        Args:
+            query: Search query
+            docs: Documents to rank
+            k: Number of results to return
+            keys: Optional cache key per document, e.g. (path, mtime, size), so
+                unchanged documents are not tokenized or vectorized again on the next
+                call, and the BM25 index is reused while every key is unchanged
+
+        Returns:
+            List of (doc index, score) pairs, best first
+        """
+        if not docs:
+            return []
+        keys = keys or [None] * len(docs)
+        if self.index is not None and self.index[0] == keys:
+            bm25 = self.index[1]
+        else:
+            bm25 = BM25(docs, counts=[self.terms(doc, key) for doc, key in zip(docs, keys)])
+            self.index = (list(keys), bm25) if None not in keys else None
+        scores = self.normalize(bm25.scores(query))
+        if self.vectors:
+            vector_scores = HashedVectors(docs, keys=keys, cache=self.cache, cache_size=self.cache_size).scores(query)
+            w = self.vector_weight
+            scores = [(1 - w) * s + w * v for s, v in zip(scores, vector_scores)]
+        return heapq.nlargest(k, enumerate(scores), key=lambda x: x[1])
@@ -0,0 +1,130 @@
+import os
+import hashlib
+from typing import Any, Dict, List, Optional
+from .utils import abspath, save_json, load_json
+from .tokens import count_tokens
+from .rank import BM25
+
+class RepoMap:
+    """
+    Persistent map of a repository: file -> list of dict(obj, desc) summaries.
+
+    Built by dev.tool.summarize (Summarize.forward on a directory) and stored as
+    one JSON file per root under the cache directory, so Dev can load it in
+    milliseconds and use the summaries as context instead of raw file contents.
+    Entries remember the (mtime, size) they were built from, so only changed
+    files are summarized again.
+    """
+
+    def __init__(self, root: str = './', cache_dir: str = '~/.commune/dev_cache', query: str = 'most relevant'):
+        """
+        Initialize the map.
+
+        Args:
+            root: Directory the map covers
+            cache_dir: Directory holding the maps (repo_maps/<hash of root>-<hash of query>.json)
+            query: Query the summaries were built for (each query has its own map)
+        """
+        self.root = abspath(root)
+        self.query = query
+        digest = lambda text: hashlib.sha256(text.encode()).hexdigest()[:16]
+        self.path = os.path.join(abspath(cache_dir), 'repo_maps', f'{digest(self.root)}-{digest(query)}.json')
+        self.files = self.load()  # {path: {'mtime': float, 'size': int, 'summary': list}}
+        self.dirty = False
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = load_json(self.path)
+        except Exception:
+            return {}
+        if data.get('root') != self.root or data.get('query') != self.query:
+            return {}
+        return data['files']
+
+    def save(self) -> Dict[str, Any]:
+        if self.dirty:
+            save_json({'root': self.root, 'query': self.query, 'files': self.files}, self.path)
+            self.dirty = False
+        return {'status': 'success', 'path': self.path, 'files': len(self.files)}
+
+    def stale(self, paths: List[str]) -> List[str]:
+        """
+        Paths that are not mapped yet or changed since they were summarized.
+        """
+        stale = []
+        for path in paths:
+            entry = self.files.get(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if entry is None or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                stale.append(path)
+        return stale
+
+    def update(self, path: str, summary: List[Dict[str, str]], stat: Optional[os.stat_result] = None):
+        """
+        Record the summary of a file as of its current (or given) stat.
+        """
+        stat = stat or os.stat(path)
+        self.files[path] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'summary': summary}
+        self.dirty = True
+
+    def prune(self, paths: List[str]) -> int:
+        """
+        Drop the entries of files that are no longer in paths.
+        """
+        keep = set(paths)
+        gone = [path for path in self.files if path not in keep]
+        for path in gone:
+            del self.files[path]
+        self.dirty = self.dirty or bool(gone)
+        return len(gone)
+
+    def get(self, path: str) -> Optional[List[Dict[str, str]]]:
+        entry = self.files.get(abspath(path))
+        return entry['summary'] if entry else None
+
+    def text(self, path: str) -> Optional[str]:
+        """
+        Render the summary of a file as one 'obj: desc' line per item.
+        """
+        summary = self.get(path)
+        if summary is None:
+            return None
+        return '\n'.join(f"{item.get('obj', '')}: {item.get('desc', '')}" if isinstance(item, dict) else str(item) for item in summary)
+
+    def rank(self, query: str, paths: Optional[List[str]] = None) -> List[str]:
+        """
+        Order the mapped paths (all by default) by BM25 match of their path and summary with a query.
+
+        Paths that are not mapped are dropped; ties keep their given order.
+        """
+        paths = [path for path in (self.files if paths is None else paths) if path in self.files]
+        scores = BM25([path + '\n' + self.text(path) for path in paths]).scores(query)
+        return [paths[i] for i in sorted(range(len(paths)), key=lambda i: -scores[i])]
+
+    def render(self, paths: Optional[List[str]] = None, budget: Optional[int] = None, model: Optional[str] = None) -> Dict[str, str]:
+        """
+        Map each path (all mapped files by default) to its summary text, within a token budget.
+
+        Args:
+            paths: Files to render, in priority order
+            budget: Token budget for all summaries together
+            model: Model whose tokenizer to use
+
+        Returns:
+            Dictionary mapping paths to summary text
+        """
+        path2text = {}
+        used = 0
+        for path in (self.files if paths is None else paths):
+            text = self.text(path)
+            if text is None:
+                continue
+            tokens = count_tokens(path, model) + count_tokens(text, model)
+            if budget is not None and used + tokens > budget:
+                break
+            path2text[path] = text
+            used += tokens
+        return path2text
@@ -0,0 +1,275 @@
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from .utils import abspath, ensure_directory_exists, list_files, is_binary_file, read_text
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # python < 3.11
+    import sre_parse
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Case-folded trigrams of a text.
+    """
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def literals(pattern: str) -> List[str]:
+    """
+    Literal substrings every match of a regex must contain.
+
+    Only the top-level sequence of the pattern is inspected, anything that is
+    not a plain literal (classes, repeats, groups, alternations...) ends a run.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+    runs, run = [], []
+    for op, arg in parsed:
+        if op == sre_parse.LITERAL:
+            run.append(chr(arg))
+        else:
+            runs.append(''.join(run))
+            run = []
+    runs.append(''.join(run))
+    return [r for r in runs if len(r) >= 3]
+
+class ContentIndex:
+    """
+    Persistent trigram inverted index over file contents, stored in SQLite.
+
+    Substring and regex queries are answered by intersecting the posting lists
+    of the query's trigrams and only reading the candidate files to verify the
+    match. Files are (re)indexed incrementally when their mtime or size changes.
+    While most of a tree is not indexed yet (cold index), queries fall back to
+    scanning the files on a thread pool and the index is built in the background.
+    """
+
+    instances = {}
+    instances_lock = threading.Lock()
+
+    def __init__(self,
+                 cache_dir: str = '~/.commune/dev_cache',
+                 max_size: int = 1_000_000,
+                 max_workers: int = 8,
+                 cold_ratio: float = 0.5,
+                 max_grams: int = 64):
+        """
+        Initialize the index.
+
+        Args:
+            cache_dir: Directory holding the index (trigrams.sqlite)
+            max_size: Files larger than this (in bytes) are not indexed, they are always scanned
+            max_workers: Number of threads used to read files
+            cold_ratio: Share of stale files above which queries scan instead of updating the index first
+            max_grams: Maximum number of a query's trigrams used to filter candidates
+        """
+        self.cache_dir = abspath(cache_dir)
+        self.path = os.path.join(self.cache_dir, 'trigrams.sqlite')
+        self.max_size = max_size
+        self.max_workers = max_workers
+        self.cold_ratio = cold_ratio
+        self.max_grams = max_grams
+        self.lock = threading.RLock()
+        self.warming = None
+        self.counts = {'queries': 0, 'scans': 0, 'candidates': 0, 'matches': 0, 'indexed': 0}
+        ensure_directory_exists(self.cache_dir)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER, indexed INTEGER)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS postings (trigram TEXT, file_id INTEGER, PRIMARY KEY (trigram, file_id)) WITHOUT ROWID')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id)')
+
+    @classmethod
+    def shared(cls, cache_dir: str = '~/.commune/dev_cache', **kwargs) -> 'ContentIndex':
+        """
+        Get the process-wide index for a cache directory.
+        """
+        key = abspath(cache_dir)
+        with cls.instances_lock:
+            if key not in cls.instances:
+                cls.instances[key] = cls(cache_dir=cache_dir, **kwargs)
+            return cls.instances[key]
+
+    def entries(self, paths: List[str]) -> Dict[str, tuple]:
+        with self.lock:
+            rows = self.conn.execute('SELECT path, mtime, size, indexed FROM files').fetchall()
+        wanted = set(paths)
+        return {row[0]: row[1:] for row in rows if row[0] in wanted}
+
+    def stale(self, paths: List[str]) -> List[str]:
+        """
+        Paths that are new or changed since they were last indexed.
+        """
+        path2entry = self.entries(paths)
+        stale = []
+        for path in paths:
+            entry = path2entry.get(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if entry is None or entry[0] != stat.st_mtime or entry[1] != stat.st_size:
+                stale.append(path)
+        return stale
+
+    def read(self, path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        try:
+            if stat.st_size > self.max_size:
+                return path, stat, None
+            if is_binary_file(path):
+                return path, stat, set()
+            return path, stat, trigrams(read_text(path))
+        except (OSError, ValueError):
+            # unreadable files are recorded like binary ones, so they are not retried until they change
+            return path, stat, set()
+
+    def update(self, paths: List[str]) -> Dict[str, Any]:
+        """
+        (Re)index the given files if they changed.
+
+        Args:
+            paths: Files to index
+
+        Returns:
+            Number of files indexed
+        """
+        stale = self.stale(paths)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = [r for r in pool.map(self.read, stale) if r is not None]
+        with self.lock:
+            self.conn.execute('BEGIN')
+            for path, stat, grams in results:
+                row = self.conn.execute('SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+                if row is not None:
+                    self.conn.execute('DELETE FROM postings WHERE file_id = ?', (row[0],))
+                    self.conn.execute('DELETE FROM files WHERE id = ?', (row[0],))
+                # binary and unreadable files are indexed with no trigrams so they never match, oversized ones are not indexed
+                cursor = self.conn.execute('INSERT INTO files (path, mtime, size, indexed) VALUES (?, ?, ?, ?)',
+                                           (path, stat.st_mtime, stat.st_size, int(grams is not None)))
+                if grams:
+                    self.conn.executemany('INSERT INTO postings VALUES (?, ?)', ((g, cursor.lastrowid) for g in grams))
+            self.conn.execute('COMMIT')
+            self.counts['indexed'] += len(results)
+        return {'status': 'success', 'indexed': len(results)}
+
+    def prune(self, directory: str, paths: List[str]):
+        """
+        Drop the entries of files under directory that no longer exist.
+        """
+        prefix = abspath(directory).rstrip(os.sep) + os.sep
+        keep = set(paths)
+        with self.lock:
+            rows = self.conn.execute('SELECT id, path FROM files WHERE path LIKE ?', (prefix.replace('%', r'\%') + '%',)).fetchall()
+            gone = [(row[0],) for row in rows if row[1] not in keep and not os.path.exists(row[1])]
+            if gone:
+                self.conn.execute('BEGIN')
+                self.conn.executemany('DELETE FROM postings WHERE file_id = ?', gone)
+                self.conn.executemany('DELETE FROM files WHERE id = ?', gone)
+                self.conn.execute('COMMIT')
+
+    def candidates(self, paths: List[str], grams: Set[str]) -> List[str]:
+        """
+        Paths that contain every trigram (or that are not indexed and must be scanned).
+
+        Long queries are filtered by an evenly spread sample of max_grams of their
+        trigrams, which keeps the statement under SQLite's variable limit; the
+        candidates are still a superset of the matches and are verified by scan.
+        """
+        if not grams:
+            return list(paths)
+        grams = sorted(grams)
+        if len(grams) > self.max_grams:
+            grams = [grams[i * len(grams) // self.max_grams] for i in range(self.max_grams)]
+        placeholders = ','.join('?' * len(grams))
+        with self.lock:
+            hits = {row[0] for row in self.conn.execute(
+                f'SELECT f.path FROM postings p JOIN files f ON f.id = p.file_id WHERE p.trigram IN ({placeholders}) '
+                f'GROUP BY p.file_id HAVING COUNT(*) = ?', (*grams, len(grams)))}
+            unindexed = {row[0] for row in self.conn.execute('SELECT path FROM files WHERE indexed = 0')}
+        return [p for p in paths if p in hits or p in unindexed]
+
+    def scan(self, paths: List[str], match) -> List[str]:
+        """
+        Read the files on a thread pool and keep the ones whose text matches.
+        """
+        def check(path):
+            try:
+                return path if not is_binary_file(path) and match(read_text(path)) else None
+            except (OSError, ValueError):
+                return None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return [p for p in pool.map(check, paths) if p is not None]
+
+    def warm(self, paths: List[str]):
+        """
+        Index the files on a background thread (once at a time).
+        """
+        if self.warming is not None and self.warming.is_alive():
+            return self.warming
+        self.warming = threading.Thread(target=self.update, args=(paths,), daemon=True)
+        self.warming.start()
+        return self.warming
+
+    def search(self,
+               directory: str,
+               query: str,
+               regex: bool = False,
+               file_pattern: str = '*',
+               ignore_patterns: Optional[List[str]] = None,
+               background: bool = True) -> List[str]:
+        """
+        Find the files under directory whose text contains query.
+
+        Args:
+            directory: Directory to search
+            query: Substring (or regex if regex=True) to search for
+            regex: Whether query is a regular expression
+            file_pattern: File pattern to match
+            ignore_patterns: Patterns to ignore
+            background: Whether a cold index is built in the background (otherwise it is built before answering)
+
+        Returns:
+            List of matching file paths
+        """
+        self.counts['queries'] += 1
+        paths = [abspath(p) for p in list_files(directory, pattern=file_pattern, ignore_patterns=ignore_patterns)]
+        if regex:
+            compiled = re.compile(query)
+            match = lambda text: compiled.search(text) is not None
+            grams = set().union(*[trigrams(s) for s in literals(query)])
+        else:
+            match = lambda text: query in text
+            grams = trigrams(query)
+        stale = self.stale(paths)
+        if background and len(stale) > self.cold_ratio * len(paths):
+            self.counts['scans'] += 1
+            self.warm(paths)
+            found = self.scan(paths, match)
+        else:
+            if stale:
+                self.update(stale)
+            self.prune(directory, paths)
+            candidates = self.candidates(paths, grams)
+            self.counts['candidates'] += len(candidates)
+            found = self.scan(candidates, match)
+        self.counts['matches'] += len(found)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report index size and query counts since construction.
+        """
+        with self.lock:
+            files = self.conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+            postings = self.conn.execute('SELECT COUNT(*) FROM postings').fetchone()[0]
+        return {'files': files, 'postings': postings, **self.counts}
@@ -0,0 +1,221 @@
+import os
+import re
+import ast
+from typing import Dict, List, Optional, Tuple
+from .rank import BM25
+from .symbols import SymbolIndex
+from .tokens import count_tokens
+from .utils import abspath, run_command
+
+def blocks(text: str, path: str = '', window: int = 40) -> List[Tuple[int, int, str]]:
+    """
+    Split a file into the blocks snippets are made of.
+
+    Python files are split into functions, methods and class headers (a def
+    keeps its decorators), with runs of other top-level statements grouped
+    together. Other files, and blocks longer than 2 * window lines, are split
+    into windows of window lines.
+
+    Returns:
+        List of (start, end, name) with 0-based, end-exclusive line numbers; name
+        is the qualified name of the def or class ('' for other blocks)
+    """
+    n = len(text.splitlines())
+    spans = []
+    tree = None
+    if path.endswith('.py'):
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            pass
+
+    def start_of(node):
+        return min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])]) - 1
+
+    def visit(body, prefix=''):
+        run = None  # [start, end] of the current run of plain statements
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                if run:
+                    spans.append((run[0], run[1], ''))
+                    run = None
+                defs = [child for child in node.body if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+                if isinstance(node, ast.ClassDef) and defs:
+                    spans.append((start_of(node), start_of(defs[0]), prefix + node.name))
+                    visit(node.body, prefix + node.name + '.')
+                else:
+                    spans.append((start_of(node), node.end_lineno, prefix + node.name))
+            elif not prefix:
+                run = [run[0] if run else start_of(node), node.end_lineno]
+        if run:
+            spans.append((run[0], run[1], ''))
+
+    if tree is not None:
+        visit(tree.body)
+    else:
+        spans = [(i, min(i + window, n), '') for i in range(0, n, window)]
+    split = []
+    for start, end, name in spans:
+        if end - start <= 2 * window:
+            split.append((start, end, name))
+        else:
+            split += [(i, min(i + window, end), name) for i in range(start, end, window)]
+    return split
+
+def merge(ranges: List[Tuple[int, int]], gap: int = 1) -> List[Tuple[int, int]]:
+    """
+    Merge overlapping ranges, and ranges at most gap lines apart.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def render(text: str, ranges: List[Tuple[int, int]]) -> str:
+    """
+    Render line ranges of a text, each under a '@@ start-end @@' header (1-based, inclusive).
+    """
+    lines = text.splitlines()
+    parts = []
+    for start, end in ranges:
+        parts.append(f'@@ {start + 1}-{end} @@')
+        parts += lines[start:end]
+    return '\n'.join(parts)
+
+def outline(text: str, path: str = '') -> str:
+    """
+    The first line of every def and class, for files none of whose blocks match.
+    """
+    lines = text.splitlines()
+    entries = [f'{start + 1}: {lines[start].strip()}' for start, end, name in blocks(text, path)
+               if name and start < len(lines)]
+    return '@@ outline @@\n' + '\n'.join(entries) if entries else ''
+
+def changed_lines(path: str = './') -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Line ranges of the uncommitted changes in a git repository.
+
+    Returns:
+        Dictionary mapping absolute file paths to (start, end) ranges (0-based,
+        end-exclusive) of the lines added or changed since HEAD; empty outside a repository
+    """
+    root = abspath(path)
+    result = run_command('git diff -U0 --no-color --relative HEAD', cwd=root)
+    if not result['success']:
+        return {}
+    path2ranges = {}
+    current = None
+    for line in result['stdout'].splitlines():
+        if line.startswith('+++ '):
+            current = None if line[4:] == '/dev/null' else os.path.join(root, line[4:].split('/', 1)[-1])
+        elif line.startswith('@@') and current:
+            match = re.match(r'@@ -\S+ \+(\d+)(?:,(\d+))? @@', line)
+            if match:
+                start, count = int(match.group(1)), int(match.group(2) or 1)
+                # a pure deletion (count 0) is anchored at the line after it
+                path2ranges.setdefault(current, []).append((max(start - 1, 0), start - 1 + max(count, 1)))
+    return path2ranges
+
+def extract(text: str,
+            query: str,
+            path: str = '',
+            max_tokens: int = 2000,
+            changed: Optional[List[Tuple[int, int]]] = None,
+            threshold: float = 0.3,
+            diff_lines: int = 5,
+            model: Optional[str] = None) -> str:
+    """
+    Extract the parts of a file relevant to a query.
+
+    Blocks (see blocks) are scored by lexical match with the query (BM25 across
+    the file's blocks), by defining or mentioning the identifiers the query
+    names, and by proximity to uncommitted changes. Blocks scoring at least
+    threshold times the best score are taken best first while they fit in
+    max_tokens, then merged where they touch and rendered in file order.
+
+    Args:
+        text: File content
+        query: What the snippets should be relevant to
+        path: File path (Python files are split along defs)
+        max_tokens: Token budget for the file's snippets
+        changed: Changed line ranges of the file (see changed_lines)
+        threshold: Minimum score relative to the best block
+        diff_lines: Blocks within this many lines of a change count as near it
+        model: Model whose tokenizer to use
+
+    Returns:
+        The rendered snippets, or the file's outline if no block matches
+    """
+    spans = blocks(text, path)
+    if not spans:
+        return text
+    lines = text.splitlines()
+    docs = ['\n'.join(lines[start:end]) for start, end, name in spans]
+    lexical = BM25(docs).scores(query)
+    best = max(lexical) or 1.0
+    names = SymbolIndex.identifiers(query)
+    patterns = [re.compile(r'\b' + re.escape(name) + r'\b') for name in names if '.' not in name]
+    scores = []
+    for (start, end, name), doc, score in zip(spans, docs, lexical):
+        score = score / best
+        if name and (name in names or name.split('.')[-1] in names):
+            score += 2.0
+        score += sum(1.0 for pattern in patterns if pattern.search(doc))
+        if changed and any(start - diff_lines < c_end and c_start < end + diff_lines for c_start, c_end in changed):
+            score += 2.0
+        scores.append(score)
+    top = max(scores)
+    if top <= 0:
+        return outline(text, path)
+    chosen = []
+    used = 0
+    for i in sorted(range(len(spans)), key=lambda i: -scores[i]):
+        if scores[i] < threshold * top:
+            break
+        tokens = count_tokens(docs[i], model)
+        if used + tokens > max_tokens:
+            continue
+        chosen.append(spans[i][:2])
+        used += tokens
+    if not chosen:
+        return outline(text, path)
+    return render(text, merge(chosen))
+
+def extract_snippets(path2text: Dict[str, str],
+                     query: str,
+                     max_tokens: int = 2000,
+                     min_tokens: int = 500,
+                     changed: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                     model: Optional[str] = None) -> Dict[str, str]:
+    """
+    Replace each file's text by its snippets relevant to a query.
+
+    Args:
+        path2text: Files to extract from, in priority order
+        query: What the snippets should be relevant to
+        max_tokens: Token budget per file
+        min_tokens: Files up to this many tokens are kept whole
+        changed: Changed line ranges per file (see changed_lines)
+        model: Model whose tokenizer to use
+
+    Returns:
+        Dictionary mapping each path to its snippets (or whole text), in the same order
+    """
+    changed = changed or {}
+    path2snippets = {}
+    for path, text in path2text.items():
+        if text is None or count_tokens(text, model) <= min_tokens:
+            path2snippets[path] = text
+            continue
+        path2snippets[path] = extract(text, query, path=path, max_tokens=max_tokens,
+                                      changed=changed.get(abspath(path)), model=model)
+    return path2snippets
+
+def render_context(context: Dict[str, str]) -> str:
+    """
+    Render a {path: text} context as plain text, one '--- path' section per file.
+    """
+    return '\n'.join(f'--- {path}\n{text}' for path, text in context.items())
@@ -0,0 +1,180 @@
+import os
+import re
+import ast
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from .utils import abspath, ensure_directory_exists, save_json, load_json
+
+def parse_symbols(source: str) -> Dict[str, List[str]]:
+    """
+    Extract the symbols of a Python module with ast.
+
+    Args:
+        source: Module source code
+
+    Returns:
+        Dictionary with the names the module defines (classes, functions and
+        methods, plain and qualified as Class.method), imports (modules and
+        imported names) and references (called names and attributes)
+    """
+    tree = ast.parse(source)
+    defines, imports, references = set(), set(), set()
+
+    def visit(node, prefix=''):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                defines.add(child.name)
+                if prefix:
+                    defines.add(prefix + child.name)
+                visit(child, prefix + child.name + '.')
+                continue
+            if isinstance(child, ast.Import):
+                for alias in child.names:
+                    imports.update([alias.name, alias.name.split('.')[-1], alias.asname or alias.name])
+            elif isinstance(child, ast.ImportFrom):
+                if child.module:
+                    imports.update([child.module, child.module.split('.')[-1]])
+                imports.update(alias.name for alias in child.names)
+            elif isinstance(child, ast.Call):
+                func = child.func
+                if isinstance(func, ast.Name):
+                    references.add(func.id)
+                elif isinstance(func, ast.Attribute):
+                    references.add(func.attr)
+            elif isinstance(child, ast.Attribute):
+                references.add(child.attr)
+            visit(child, prefix)
+
+    visit(tree)
+    imports.discard('*')
+    return {'defines': sorted(defines), 'imports': sorted(imports), 'references': sorted(references - defines)}
+
+class SymbolIndex:
+    """
+    Persistent static index of the Python symbols in a set of files.
+
+    Each file's definitions, imports and call references are extracted with
+    ast and stored with the (mtime, size) they were parsed at, so only edited
+    files are parsed again. Queries are matched against symbol names to find
+    the files that define or use what the query mentions, without any LLM call.
+    """
+
+    weights = {'defines': 3.0, 'imports': 1.0, 'references': 1.0}
+
+    def __init__(self, cache_dir: str = '~/.commune/dev_cache', max_size: int = 1_000_000):
+        """
+        Initialize the index.
+
+        Args:
+            cache_dir: Directory holding the persisted index (symbols.json)
+            max_size: Files larger than this (in bytes) are not parsed
+        """
+        self.cache_dir = abspath(cache_dir)
+        self.index_path = os.path.join(self.cache_dir, 'symbols.json')
+        self.max_size = max_size
+        self.entries = self.load()  # {path: {'mtime', 'size', 'defines', 'imports', 'references'}}
+        self.symbol2paths = None  # {symbol: {path: score}}, rebuilt lazily after updates
+        self.dirty = False
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return load_json(self.index_path)
+        except Exception:
+            return {}
+
+    def save(self) -> Dict[str, Any]:
+        if self.dirty:
+            ensure_directory_exists(self.cache_dir)
+            save_json(self.entries, self.index_path)
+            self.dirty = False
+        return {'status': 'success', 'path': self.index_path, 'files': len(self.entries)}
+
+    def update(self, paths: List[str]) -> int:
+        """
+        Parse the Python files among paths that are new or changed.
+
+        Returns:
+            Number of files parsed
+        """
+        parsed = 0
+        for path in paths:
+            path = abspath(path)
+            if not path.endswith('.py'):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = self.entries.get(path)
+            if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                continue
+            symbols = {'defines': [], 'imports': [], 'references': []}
+            if stat.st_size <= self.max_size:
+                try:
+                    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                        symbols = parse_symbols(f.read())
+                except (SyntaxError, ValueError, OSError):
+                    pass
+            self.entries[path] = {'mtime': stat.st_mtime, 'size': stat.st_size, **symbols}
+            self.symbol2paths = None
+            self.dirty = True
+            parsed += 1
+        self.save()
+        return parsed
+
+    def build(self):
+        self.symbol2paths = {}
+        for path, entry in self.entries.items():
+            for kind, weight in self.weights.items():
+                for symbol in entry[kind]:
+                    path2score = self.symbol2paths.setdefault(symbol, {})
+                    path2score[path] = max(path2score.get(path, 0.0), weight)
+        return self.symbol2paths
+
+    @staticmethod
+    def identifiers(query: str, min_length: int = 3) -> List[str]:
+        """
+        Symbol names mentioned in a query, e.g. 'fix Dev.forward' -> ['Dev.forward', 'Dev', 'forward'].
+
+        Only words that look like code count: dotted, snake_case, CamelCase or
+        `backticked` names, so plain English words ('update', 'install') never
+        match the functions that happen to share their name.
+        """
+        names = []
+        pattern = r'(`?)([A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)(`?)'
+        for open_tick, name, close_tick in re.findall(pattern, query):
+            code = (open_tick and close_tick) or '.' in name or '_' in name or re.search(r'[a-z][A-Z]|^[A-Z][a-z0-9]+[A-Z]', name)
+            if not code:
+                continue
+            for part in [name] + (name.split('.') if '.' in name else []):
+                if len(part) >= min_length and part not in names:
+                    names.append(part)
+        return names
+
+    def lookup(self, query: str, paths: Optional[List[str]] = None, max_ratio: float = 0.5) -> List[Tuple[str, float]]:
+        """
+        Rank the files that define or reference the symbols mentioned in a query.
+
+        Args:
+            query: Query mentioning symbols (names are matched exactly)
+            paths: Only consider these files (and index them first if needed)
+            max_ratio: Ignore symbols found in more than this share of the files (e.g. 'print')
+
+        Returns:
+            List of (path, score) pairs, best first; definitions weigh more than uses
+            and rare symbols more than common ones
+        """
+        if paths is not None:
+            self.update(paths)
+        symbol2paths = self.symbol2paths if self.symbol2paths is not None else self.build()
+        allowed = set(abspath(p) for p in paths) if paths is not None else None
+        n = len(self.entries) if allowed is None else len(allowed & self.entries.keys())
+        path2score = {}
+        for symbol in self.identifiers(query):
+            hits = {p: s for p, s in symbol2paths.get(symbol, {}).items() if allowed is None or p in allowed}
+            if not hits or len(hits) > max(max_ratio * n, 1):
+                continue
+            idf = math.log(1 + n / len(hits))
+            for path, score in hits.items():
+                path2score[path] = path2score.get(path, 0.0) + score * idf
+        return sorted(path2score.items(), key=lambda x: (-x[1], x[0]))
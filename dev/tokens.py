@@ -0,0 +1,172 @@
+import re
+import ast
+import hashlib
+import functools
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(model: Optional[str] = None):
+    """
+    Get a tiktoken encoder for a model, or None if tiktoken is not installed.
+
+    Args:
+        model: Model name (provider prefixes like 'openai/' are stripped)
+
+    Returns:
+        The encoder, or None
+    """
+    try:
+        import tiktoken
+    except ImportError:  # fall back to the local approximation
+        return None
+    try:
+        return tiktoken.encoding_for_model(str(model).split('/')[-1])
+    except Exception:
+        return tiktoken.get_encoding('cl100k_base')
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count the tokens in a text.
+
+    Uses tiktoken when available, otherwise approximates BPE by counting one
+    token per 4 characters of each word and one per punctuation character.
+
+    Args:
+        text: Text to measure
+        model: Model whose tokenizer to use
+
+    Returns:
+        Number of tokens
+    """
+    text = str(text)
+    encoder = get_encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    words = re.findall(r'\w+', text)
+    return sum((len(w) + 3) // 4 for w in words) + len(re.findall(r'[^\w\s]', text))
+
+def truncate_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Truncate a text to at most max_tokens, cutting at a line boundary when possible.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+        model: Model whose tokenizer to use
+
+    Returns:
+        The truncated text, ending with a marker if anything was cut
+    """
+    tokens = count_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+    keep = max(max_tokens - 16, 0)  # leave room for the marker
+    encoder = get_encoder(model)
+    if encoder is not None:
+        head = encoder.decode(encoder.encode(text, disallowed_special=())[:keep])
+    else:
+        head = text[:int(len(text) * keep / tokens)]
+    if '\n' in head:
+        head = head[:head.rindex('\n')]
+    return head + f'\n... [truncated {tokens - count_tokens(head, model)} tokens]'
+
+def plan_context(path2text: Dict[str, str],
+                 budget: int,
+                 model: Optional[str] = None,
+                 min_tokens: int = 200,
+                 summarize: Optional[Callable[[str, str, int], str]] = None) -> Dict[str, Any]:
+    """
+    Pack files into a token budget in relevance order.
+
+    Files are taken in the order given (most relevant first). A file that fits is
+    kept whole; the first one that does not fit is summarized (if a summarize
+    callable is given) or truncated into the remaining budget, and files that
+    would get fewer than min_tokens are dropped.
+
+    Args:
+        path2text: Files to pack, most relevant first
+        budget: Token budget for all files together
+        model: Model whose tokenizer to use
+        min_tokens: Smallest partial file worth including
+        summarize: Optional fn(path, text, max_tokens) -> str for overflowing files
+
+    Returns:
+        Dictionary with the packed context, the per-file plan, the budget and the tokens used
+    """
+    context = {}
+    plan = []
+    used = 0
+    for path, text in path2text.items():
+        if text is None:
+            continue
+        tokens = count_tokens(text, model)
+        remaining = budget - used
+        if tokens <= remaining:
+            action = 'full'
+        elif remaining >= min_tokens:
+            if summarize is not None:
+                text, action = truncate_tokens(summarize(path, text, remaining), remaining, model), 'summarized'
+            else:
+                text, action = truncate_tokens(text, remaining, model), 'truncated'
+        else:
+            plan.append({'path': path, 'tokens': tokens, 'used': 0, 'action': 'dropped'})
+            continue
+        n = count_tokens(text, model) if action != 'full' else tokens
+        context[path] = text
+        used += n
+        plan.append({'path': path, 'tokens': tokens, 'used': n, 'action': action})
+    return {'context': context, 'plan': plan, 'budget': budget, 'used': used}
+
+def chunk_text(content: str, path: str = '', max_tokens: int = 4000, model: Optional[str] = None) -> List[Tuple[int, str]]:
+    """
+    Split content into chunks of at most max_tokens along syntactic boundaries.
+
+    Python files are split between top-level statements (a def or class keeps
+    its decorators, and comments after it stay with it); other files, and
+    statements longer than max_tokens, are split between lines. Chunk
+    boundaries are content-defined: a chunk ends after a piece whose hash falls
+    below (its tokens / max_tokens), or where the next piece would
+    overflow max_tokens. An edit therefore only moves the boundaries of the
+    chunk it falls in (and at most until the next content-defined boundary),
+    so the other chunks keep their text and their cached summaries.
+
+    Returns:
+        List of (start_line, text) with 0-based start lines
+    """
+    lines = content.splitlines(keepends=True)
+    if count_tokens(content, model) <= max_tokens:
+        return [(0, content)]
+    bounds = [0, len(lines)]
+    if path.endswith('.py'):
+        try:
+            tree = ast.parse(content)
+            for node in tree.body:
+                bounds.append(min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])]) - 1)
+        except (SyntaxError, ValueError):
+            pass
+    bounds = sorted(set(bounds))
+    # [(start, end, tokens)] pieces that each fit in a chunk
+    pieces = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        tokens = count_tokens(''.join(lines[start:end]), model)
+        if tokens <= max_tokens:
+            pieces.append((start, end, tokens))
+        else:
+            pieces += [(i, i + 1, count_tokens(lines[i], model)) for i in range(start, end)]
+    target = max(max_tokens, 1)
+    chunks = []
+    start, tokens = None, 0
+    for piece_start, piece_end, piece_tokens in pieces:
+        if start is not None and tokens + piece_tokens > max_tokens:
+            chunks.append((start, ''.join(lines[start:piece_start])))
+            start, tokens = None, 0
+        if start is None:
+            start = piece_start
+        tokens += piece_tokens
+        digest = hashlib.sha256(''.join(lines[piece_start:piece_end]).encode()).hexdigest()
+        if int(digest[:8], 16) / 16 ** 8 < piece_tokens / target:
+            chunks.append((start, ''.join(lines[start:piece_end])))
+            start, tokens = None, 0
+    if start is not None:
+        chunks.append((start, ''.join(lines[start:])))
+    return chunks
@@ -3,8 +3,14 @@ import commune as c
 import os
 import json
 import time
-from typing import Dict, List, Any, Optional, Union
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from .store import get_store, ShortTermStore
+from .vectors import VectorIndex, np
+from ...rank import Ranker
+from ...cache import Cache
 
 class Memory:
     """
@@ -12,7 +18,7 @@ class Memory:
     
     This tool helps maintain context across interactions by:
     - Storing temporary information in short-term memory (in-memory)
-    - Persisting important information in long-term memory (file-based)
+    - Persisting important information in long-term memory (append-only log, sqlite or one file per key)
     - Retrieving and filtering memories based on relevance
     - Managing memory expiration and prioritization
     """
@@ -23,6 +29,8 @@ class Memory:
         short_term_capacity: int = 100,
         default_ttl: int = 3600,  # 1 hour default TTL for short-term memory
         model: str = 'dev.model.openrouter',
+        backend: str = 'log',
+        vectors: bool = True,
         **kwargs
     ):
         """
@@ -33,6 +41,8 @@ class Memory:
             short_term_capacity: Maximum number of items in short-term memory
             default_ttl: Default time-to-live for short-term memories (in seconds)
             model: Model to use for relevance scoring
+            backend: Long-term storage backend ('log', 'sqlite' or 'file')
+            vectors: Whether to keep a local vector index for search_long_term (requires numpy)
             **kwargs: Additional arguments to pass to the model
         """
         self.model = c.module(model)(**kwargs)
@@ -41,10 +51,16 @@ class Memory:
         self.default_ttl = default_ttl
         
         # Initialize memory stores
-        self.short_term = {}  # {key: {'data': Any, 'timestamp': float, 'ttl': int}}
+        self.short_term = ShortTermStore(short_term_capacity, default_ttl)  # {key: {'data': Any, 'timestamp': float, 'ttl': int}}
         
-        # Ensure long-term storage directory exists
-        os.makedirs(self.long_term_path, exist_ok=True)
+        # Open the long-term store (creates the directory)
+        self.store = get_store(backend, self.long_term_path)
+        self.vectors = VectorIndex(self.long_term_path) if vectors and np is not None else None
+        if self.vectors is not None:
+            self.vectors.sync(self.store)
+        
+        # Per-batch summaries, keyed by the content of the batch
+        self.summaries = Cache(os.path.join(self.long_term_path, 'summaries.sqlite'), max_entries=10000)
         
     def add_short_term(
         self, 
@@ -63,25 +79,14 @@ class Memory:
         Returns:
             Dictionary with status and info about the stored memory
         """
-        # Clean expired items first
-        self._clean_expired_short_term()
-        
-        # Check capacity
-        if len(self.short_term) >= self.short_term_capacity:
-            self._evict_short_term()
-            
-        # Store with timestamp
-        self.short_term[key] = {
-            'data': data,
-            'timestamp': time.time(),
-            'ttl': ttl if ttl is not None else self.default_ttl
-        }
+        # Expired items are dropped and the least recently used item is evicted if full
+        entry = self.short_term.put(key, data, ttl)
         
         return {
             'status': 'success',
             'key': key,
-            'ttl': ttl if ttl is not None else self.default_ttl,
-            'expires_at': time.time() + (ttl if ttl is not None else self.default_ttl)
+            'ttl': entry['ttl'],
+            'expires_at': entry['timestamp'] + entry['ttl']
         }
     
     def get_short_term(self, key: str) -> Optional[Any]:
@@ -94,15 +99,8 @@ class Memory:
         Returns:
             The stored data or None if not found or expired
         """
-        # Clean expired items first
-        self._clean_expired_short_term()
-        
-        if key in self.short_term:
-            # Update access timestamp (keeps frequently accessed items alive)
-            self.short_term[key]['timestamp'] = time.time()
-            return self.short_term[key]['data']
-        
-        return None
+        # Updates the access timestamp (keeps frequently accessed items alive)
+        return self.short_term.get(key)
     
     def add_long_term(self, key: str, data: Any) -> Dict[str, Any]:
         """
@@ -115,10 +113,6 @@ class Memory:
         Returns:
             Dictionary with status and info about the stored memory
         """
-        # Sanitize key for filename
-        safe_key = self._sanitize_key(key)
-        file_path = os.path.join(self.long_term_path, f"{safe_key}.json")
-        
         memory_data = {
             'data': data,
             'timestamp': time.time(),
@@ -130,9 +124,9 @@ class Memory:
         }
         
         try:
-            with open(file_path, 'w') as f:
-                json.dump(memory_data, f, indent=2)
-                
+            file_path = self.store.put(key, memory_data)
+            if self.vectors is not None:
+                self.vectors.add(self.store.canonical(key), data, memory_data['timestamp'])
             return {
                 'status': 'success',
                 'key': key,
@@ -155,18 +149,43 @@ class Memory:
         Returns:
             The stored data or None if not found
         """
-        safe_key = self._sanitize_key(key)
-        file_path = os.path.join(self.long_term_path, f"{safe_key}.json")
+        memory_data = self.store.get(key)
+        return memory_data['data'] if memory_data is not None else None
+    
+    def load_long_term(self, items: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Bulk-add items to long-term memory in a single write.
         
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    memory_data = json.load(f)
-                return memory_data['data']
-            except Exception:
-                return None
+        Args:
+            items: Dictionary mapping keys to data
+            
+        Returns:
+            Dictionary with status and the number of stored memories
+        """
+        now = time.time()
+        if self.vectors is not None:
+            self.vectors.add_many((self.store.canonical(key), data, now) for key, data in items.items())
+        count = self.store.put_many(
+            (key, {'data': data, 'timestamp': now, 'metadata': {'created_at': now, 'key': key, 'type': type(data).__name__}})
+            for key, data in items.items()
+        )
+        return {'status': 'success', 'count': count}
+    
+    def range_long_term(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        List long-term memories stored between two timestamps, oldest first.
         
-        return None
+        Args:
+            start: Earliest timestamp (None for no lower bound)
+            end: Latest timestamp (None for no upper bound)
+            
+        Returns:
+            List of memory items with metadata
+        """
+        return [
+            {'key': key, 'data': record['data'], 'timestamp': record['timestamp'], 'metadata': record.get('metadata', {})}
+            for key, record in self.store.scan(start, end)
+        ]
     
     def list_memories(
         self, 
@@ -190,14 +209,7 @@ class Memory:
             result['short_term'] = list(self.short_term.keys())
             
         if memory_type in ['long', 'all']:
-            try:
-                files = os.listdir(self.long_term_path)
-                result['long_term'] = [
-                    os.path.splitext(f)[0] for f in files 
-                    if f.endswith('.json')
-                ]
-            except Exception:
-                result['long_term'] = []
+            result['long_term'] = self.store.keys()
                 
         return result
     
@@ -224,16 +236,14 @@ class Memory:
                 result['deleted'].append('short_term')
                 
         if memory_type in ['long', 'all']:
-            safe_key = self._sanitize_key(key)
-            file_path = os.path.join(self.long_term_path, f"{safe_key}.json")
-            
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
+            try:
+                if self.store.delete(key):
                     result['deleted'].append('long_term')
-                except Exception as e:
-                    result['status'] = 'partial'
-                    result['error'] = str(e)
+                if self.vectors is not None:
+                    self.vectors.remove(self.store.canonical(key))
+            except Exception as e:
+                result['status'] = 'partial'
+                result['error'] = str(e)
         
         if not result['deleted']:
             result['status'] = 'not_found'
@@ -346,33 +356,14 @@ class Memory:
         Returns:
             Number of items removed
         """
-        now = time.time()
-        expired_keys = [
-            key for key, value in self.short_term.items()
-            if now > value['timestamp'] + value['ttl']
-        ]
-        
-        for key in expired_keys:
-            del self.short_term[key]
-            
-        return len(expired_keys)
+        return self.short_term.expire()
     
     def _evict_short_term(self) -> None:
         """
         Evict items from short-term memory when capacity is reached.
         Uses LRU (Least Recently Used) strategy.
         """
-        if not self.short_term:
-            return
-            
-        # Find oldest item by timestamp
-        oldest_key = min(
-            self.short_term.keys(),
-            key=lambda k: self.short_term[k]['timestamp']
-        )
-        
-        # Remove it
-        del self.short_term[oldest_key]
+        self.short_term.evict()
     
     def _sanitize_key(self, key: str) -> str:
         """
@@ -392,45 +383,36 @@ class Memory:
         self, 
         query: str, 
         n: int = 5,
+        shortlist: int = 20,
+        rerank: bool = True,
         **kwargs
     ) -> List[Dict[str, Any]]:
         """
         Search long-term memory for relevant items.
         
+        Memories are shortlisted locally (cosine similarity over the vector
+        index, or BM25 without numpy) and the model only re-ranks the shortlist.
+        
         Args:
             query: Search query
             n: Maximum number of items to return
+            shortlist: Number of candidates passed to the model for re-ranking
+            rerank: Whether to re-rank the shortlist with the model
             **kwargs: Additional arguments for the model
             
         Returns:
             List of relevant memory items with metadata
         """
-        # Get all long-term memories
-        memories = []
         try:
-            files = os.listdir(self.long_term_path)
-            for filename in files:
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.long_term_path, filename)
-                    try:
-                        with open(file_path, 'r') as f:
-                            memory_data = json.load(f)
-                            memories.append({
-                                'key': os.path.splitext(filename)[0],
-                                'data': memory_data['data'],
-                                'timestamp': memory_data['timestamp'],
-                                'metadata': memory_data.get('metadata', {})
-                            })
-                    except Exception:
-                        continue
+            memories = self._shortlist_long_term(query, max(n, shortlist))
         except Exception as e:
             c.print(f"Error searching long-term memory: {e}", color="red")
             return []
         
-        if not memories:
-            return []
+        if not rerank or len(memories) <= n:
+            return memories[:n]
             
-        # Use the model to rank memories by relevance
+        # Use the model to re-rank the shortlist by relevance
         memory_texts = [
             f"Memory {i}: {str(mem['data'])[:500]}" 
             for i, mem in enumerate(memories)
@@ -454,28 +436,57 @@ class Memory:
                 try:
                     indices = json.loads(json_match.group(0))
                     # Return the memories in order of relevance
-                    return [memories[i] for i in indices if i < len(memories)]
+                    return [memories[i] for i in indices if i < len(memories)][:n]
                 except (json.JSONDecodeError, TypeError, IndexError):
                     pass
         except Exception as e:
             c.print(f"Error in relevance ranking: {e}", color="red")
         
-        # Fallback: return most recent memories
-        memories.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Fallback: return the local ranking
         return memories[:n]
     
+    def _shortlist_long_term(self, query: str, k: int) -> List[Dict[str, Any]]:
+        """
+        Rank long-term memories locally and return the top k, best first.
+        """
+        if self.vectors is not None:
+            memories = []
+            for key, score in self.vectors.search(query, k=k):
+                record = self.store.get(key)
+                if record is not None:
+                    memories.append({'key': key, 'data': record['data'], 'timestamp': record['timestamp'],
+                                     'metadata': record.get('metadata', {}), 'score': score})
+            return memories
+        memories = self.range_long_term()
+        ranked = Ranker(vectors=False).forward(query, [f"{m['key']} {str(m['data'])[:2000]}" for m in memories], k=k)
+        return [{**memories[i], 'score': score} for i, score in ranked]
+    
     def summarize_memories(
         self, 
         query: Optional[str] = None, 
         memory_type: str = 'all',
+        batch_size: int = 20,
+        n: int = 50,
+        concurrency: int = 8,
         **kwargs
     ) -> str:
         """
         Generate a summary of relevant memories.
         
+        Memories are summarized map-reduce style: they are split into batches in
+        chronological order, the batches are summarized in parallel and the batch
+        summaries are combined (recursively, about batch_size at a time). Batches
+        end at content-defined boundaries (see _batches) and every summary is cached
+        by the hash of its inputs, so adding, changing or deleting a memory only
+        sends the batch holding it (and the summaries above it) to the model again.
+        Summaries built on a failed batch are returned but not cached.
+        
         Args:
             query: Optional query to filter relevant memories
             memory_type: Type of memories to summarize ('short', 'long', or 'all')
+            batch_size: Number of memories (or summaries) summarized per call
+            n: Number of long-term memories summarized (the most relevant to the query, or the most recent)
+            concurrency: Maximum number of summarization calls in flight
             **kwargs: Additional arguments for the model
             
         Returns:
@@ -494,13 +505,13 @@ class Memory:
                     'timestamp': value['timestamp']
                 })
         
-        # Collect long-term memories if requested
+        # Collect long-term memories if requested (the n most relevant to the query, or the n most recent)
         if memory_type in ['long', 'all']:
-            long_term_memories = self.search_long_term(
-                query if query else "recent important information", 
-                n=10,
-                **kwargs
-            )
+            if query:
+                long_term_memories = self._shortlist_long_term(query, n)
+            else:
+                stamps = sorted(self.store.timestamps().values())
+                long_term_memories = self.range_long_term(stamps[-n] if len(stamps) > n else None)[-n:]
             for mem in long_term_memories:
                 memories.append({
                     'key': mem['key'],
@@ -512,53 +523,90 @@ class Memory:
         if not memories:
             return "No memories available."
         
-        # Sort by timestamp (newest first)
-        memories.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Oldest first, so new memories only change the last batch
+        memories.sort(key=lambda x: x['timestamp'])
+        texts = [f"Memory ({mem['source']}, {mem['key']}): {str(mem['data'])}" for mem in memories]
+        task = query if query else "Summarize recent important information"
+        batch_size = max(batch_size, 2)
         
-        # Filter by relevance if query provided
-        if query:
-            memory_texts = [
-                f"Memory {i} ({mem['source']}): {str(mem['data'])[:500]}" 
-                for i, mem in enumerate(memories)
-            ]
-            
-            prompt = str({
-                "task": "Filter these memory items by relevance to the query and return the indices of relevant items.",
-                "query": query,
-                "memory_items": memory_texts,
-                "format": "Return a JSON array of indices, e.g. [2, 5, 0]"
-            })
-            
-            try:
-                result = self.model.forward(prompt, **kwargs)
-                
-                # Parse the result
-                import re
-                json_match = re.search(r'\[.*\]', result, re.DOTALL)
-                if json_match:
-                    try:
-                        indices = json.loads(json_match.group(0))
-                        memories = [memories[i] for i in indices if i < len(memories)]
-                    except (json.JSONDecodeError, TypeError, IndexError):
-                        pass
-            except Exception:
-                pass
+        try:
+            summaries, complete = self._summarize_batches(texts, task, batch_size, concurrency, **kwargs)
+            while len(summaries) > 1:
+                summaries, ok = self._summarize_batches(summaries, task, batch_size, concurrency, cache=complete, **kwargs)
+                complete = complete and ok
+            return summaries[0]
+        except Exception as e:
+            return f"Error generating summary: {e}"
+    
+    @staticmethod
+    def _batches(texts: List[str], batch_size: int = 20) -> List[List[str]]:
+        """
+        Split texts into batches of about batch_size, ending a batch after a text
+        whose hash is divisible by batch_size (or once it holds 2 * batch_size).
         
-        # Generate summary
-        memory_texts = [
-            f"Memory {i+1} ({mem['source']}): {str(mem['data'])}" 
-            for i, mem in enumerate(memories)
-        ]
+        Since boundaries depend on the texts themselves, inserting or deleting a
+        text only changes the batch it falls in, not every batch after it. Batches
+        hold at least 2 texts, so each reduce level shrinks.
+        """
+        batches, batch = [], []
+        for text in texts:
+            batch.append(text)
+            boundary = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16) % batch_size == 0
+            if len(batch) >= 2 and (boundary or len(batch) >= 2 * batch_size):
+                batches.append(batch)
+                batch = []
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _summarize_batches(
+        self, 
+        texts: List[str], 
+        query: str, 
+        batch_size: int = 20,
+        concurrency: int = 8,
+        cache: bool = True,
+        **kwargs
+    ) -> Tuple[List[str], bool]:
+        """
+        Summarize texts in batches (see _batches), reusing the cached summary of unchanged batches.
         
-        prompt = str({
+        Args:
+            cache: Whether to cache new summaries (off when the texts lack a failed batch's summary)
+        
+        Returns:
+            One summary per successfully summarized batch, in order, and whether every batch succeeded
+        """
+        batches = self._batches(texts, batch_size)
+        keys = [Cache.key('memory_summary', batch, query, kwargs.get('model')) for batch in batches]
+        summaries = [self.summaries.get(key) for key in keys]
+        todo = [i for i, summary in enumerate(summaries) if summary is None]
+        if not todo:
+            return summaries, True
+        prompts = [str({
             "task": "Summarize these memory items into a coherent summary.",
-            "memory_items": memory_texts,
-            "query": query if query else "Summarize recent important information",
+            "memory_items": batches[i],
+            "query": query,
             "format": "Return a concise summary that captures the key information."
-        })
-        
-        try:
-            summary = self.model.forward(prompt, **kwargs)
-            return summary
-        except Exception as e:
-            return f"Error generating summary: {e}"
+        }) for i in todo]
+        if hasattr(self.model, 'batch_forward'):
+            results = self.model.batch_forward(prompts, concurrency=concurrency, return_exceptions=True, **kwargs)
+        else:
+            def call(prompt):
+                try:
+                    return self.model.forward(prompt, **kwargs)
+                except Exception as e:
+                    return e
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(call, prompts))
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        for i, result in zip(todo, results):
+            if isinstance(result, Exception):
+                c.print(f"Error summarizing memory batch {i}: {result}", color="red")
+                continue
+            summaries[i] = result
+            if cache:
+                self.summaries.put(keys[i], result)
+        return [summary for summary in summaries if summary is not None], not errors
@@ -0,0 +1,447 @@
+import os
+import re
+import json
+import time
+import heapq
+import sqlite3
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+class FileStore:
+    """
+    One pretty-printed JSON file per key (the original long-term memory layout).
+
+    Every record is a dict with at least 'data' and 'timestamp'.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def sanitize(key: str) -> str:
+        return re.sub(r'[^\w\-\.]', '_', str(key))
+
+    def canonical(self, key: str) -> str:
+        # the key this store lists a memory under
+        return self.sanitize(key)
+
+    def file(self, key: str) -> str:
+        return os.path.join(self.path, f"{self.sanitize(key)}.json")
+
+    def put(self, key: str, record: Dict[str, Any]) -> str:
+        path = self.file(key)
+        with open(path, 'w') as f:
+            json.dump(record, f, indent=2)
+        return path
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        return sum(1 for key, record in items if self.put(key, record))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.file(key), 'r') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def delete(self, key: str) -> bool:
+        path = self.file(key)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    def keys(self) -> List[str]:
+        try:
+            return [os.path.splitext(f)[0] for f in os.listdir(self.path) if f.endswith('.json')]
+        except Exception:
+            return []
+
+    def timestamps(self) -> Dict[str, float]:
+        return {key: record['timestamp'] for key, record in self.scan()}
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        items = [(key, self.get(key)) for key in self.keys()]
+        items = [(key, record) for key, record in items if record is not None and in_range(record, start, end)]
+        yield from sorted(items, key=lambda item: item[1]['timestamp'])
+
+    def close(self):
+        pass
+
+class LogStore:
+    """
+    Append-only JSON-lines log with an in-memory index of each key's latest record.
+
+    Writes append one line, reads seek straight to the record (O(1) get) and
+    range scans walk a timestamp-sorted view of the index. Deletes append a
+    tombstone; the log is compacted once most of it is superseded records.
+    File-per-key memories found in the directory are imported on first open.
+
+    Several instances (or processes) can share a log: every operation holds a
+    lock on a sibling .lock file (shared for reads, exclusive for writes) and
+    first catches up with lines other instances appended, or reloads the index
+    if another instance compacted the log into a new file.
+    """
+
+    def __init__(self, path: str, filename: str = 'memories.log', compact_ratio: float = 0.5, min_compact: int = 1000):
+        """
+        Initialize the store.
+
+        Args:
+            path: Directory holding the log
+            filename: Name of the log file
+            compact_ratio: Compact once this share of the log's lines are stale
+            min_compact: Never compact logs with fewer lines than this
+        """
+        self.path = os.path.expanduser(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.log_path = os.path.join(self.path, filename)
+        self.compact_ratio = compact_ratio
+        self.min_compact = min_compact
+        self.lock = threading.RLock()
+        self.lock_file = open(self.log_path + '.lock', 'a+b')
+        self.depth = 0  # nesting of locked(), only the outermost takes the file lock
+        self.index = {}  # {key: (offset, timestamp)}
+        self.lines = 0
+        self.size = 0  # bytes of the log read into the index
+        self.f = None
+        self.inode = None
+        fresh = not os.path.exists(self.log_path)
+        with self.locked():
+            pass
+        if fresh and not self.index:
+            legacy = FileStore(self.path)
+            self.put_many((record.get('metadata', {}).get('key', key), record) for key, record in legacy.scan())
+
+    @contextlib.contextmanager
+    def locked(self, exclusive: bool = True):
+        """
+        Hold the thread and file locks, with the index caught up with the log.
+        """
+        with self.lock:
+            outer = self.depth == 0
+            if outer and fcntl is not None:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self.depth += 1
+            try:
+                if outer:
+                    self.refresh(truncate=exclusive)
+                yield
+            finally:
+                self.depth -= 1
+                if outer and fcntl is not None:
+                    fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+
+    def refresh(self, truncate: bool = False):
+        """
+        Reopen the log if it was replaced (compacted elsewhere), then read any lines appended since the last call.
+        """
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            stat = None
+        if self.f is None or stat is None or stat.st_ino != self.inode or stat.st_size < self.size:
+            if self.f is not None:
+                self.f.close()
+            self.f = open(self.log_path, 'a+b')
+            self.inode = os.fstat(self.f.fileno()).st_ino
+            self.index, self.lines, self.size = {}, 0, 0
+        if stat is not None and stat.st_size != self.size:
+            self.load(truncate)
+
+    def load(self, truncate: bool = False):
+        """
+        Read the log from where the index left off, stopping at a torn last line
+        (which is cut off when truncate is set, i.e. under the exclusive lock).
+        """
+        self.f.seek(self.size)
+        offset = self.size
+        for line in self.f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            self.lines += 1
+            if entry.get('deleted'):
+                self.index.pop(entry['key'], None)
+            else:
+                self.index[entry['key']] = (offset, entry['record']['timestamp'])
+            offset += len(line)
+        self.size = offset
+        if truncate and offset != os.fstat(self.f.fileno()).st_size:
+            self.f.truncate(offset)
+
+    def append(self, entries: List[Dict[str, Any]]) -> List[int]:
+        # called under the exclusive lock, so the log ends where the index does
+        offset = self.size
+        offsets, lines = [], []
+        for entry in entries:
+            line = (json.dumps(entry) + '\n').encode()
+            offsets.append(offset)
+            lines.append(line)
+            offset += len(line)
+        self.f.seek(0, os.SEEK_END)
+        self.f.write(b''.join(lines))
+        self.f.flush()
+        self.lines += len(entries)
+        self.size = offset
+        return offsets
+
+    def canonical(self, key: str) -> str:
+        return key
+
+    def put(self, key: str, record: Dict[str, Any]) -> str:
+        self.put_many([(key, record)])
+        return self.log_path
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Append many records with a single write.
+        """
+        entries = [{'key': key, 'record': record} for key, record in items]
+        if not entries:
+            return 0
+        with self.locked():
+            for entry, offset in zip(entries, self.append(entries)):
+                self.index[entry['key']] = (offset, entry['record']['timestamp'])
+            self.maybe_compact()
+        return len(entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.locked(exclusive=False):
+            if key not in self.index:
+                return None
+            self.f.seek(self.index[key][0])
+            return json.loads(self.f.readline())['record']
+
+    def delete(self, key: str) -> bool:
+        with self.locked():
+            if key not in self.index:
+                return False
+            self.append([{'key': key, 'deleted': True}])
+            del self.index[key]
+            self.maybe_compact()
+            return True
+
+    def keys(self) -> List[str]:
+        with self.locked(exclusive=False):
+            return list(self.index)
+
+    def timestamps(self) -> Dict[str, float]:
+        with self.locked(exclusive=False):
+            return {key: ts for key, (_, ts) in self.index.items()}
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self.locked(exclusive=False):
+            keys = [key for key, (_, ts) in sorted(self.index.items(), key=lambda item: item[1][1])
+                    if (start is None or ts >= start) and (end is None or ts <= end)]
+        for key in keys:
+            record = self.get(key)
+            if record is not None:
+                yield key, record
+
+    def maybe_compact(self):
+        if self.lines >= self.min_compact and self.lines - len(self.index) > self.compact_ratio * self.lines:
+            self.compact()
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Rewrite the log with only the live records and swap it in atomically.
+
+        Other instances notice the new file (by its inode) on their next operation.
+        """
+        with self.locked():
+            before = self.lines
+            tmp_path = self.log_path + '.tmp'
+            index = {}
+            with open(tmp_path, 'wb') as out:
+                for key, (offset, ts) in self.index.items():
+                    self.f.seek(offset)
+                    line = self.f.readline()
+                    index[key] = (out.tell(), ts)
+                    out.write(line)
+                out.flush()
+                os.fsync(out.fileno())
+                size = out.tell()
+            self.f.close()
+            os.replace(tmp_path, self.log_path)
+            self.f = open(self.log_path, 'a+b')
+            self.inode = os.fstat(self.f.fileno()).st_ino
+            self.index = index
+            self.lines = len(index)
+            self.size = size
+        return {'status': 'success', 'before': before, 'after': self.lines}
+
+    def close(self):
+        with self.lock:
+            if self.f is not None:
+                self.f.close()
+            self.lock_file.close()
+
+class SQLiteStore:
+    """
+    Records in a SQLite table indexed by key and timestamp.
+    """
+
+    def __init__(self, path: str, filename: str = 'memories.sqlite'):
+        self.path = os.path.expanduser(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(self.path, filename), check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS memories (key TEXT PRIMARY KEY, record TEXT, timestamp REAL)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS memories_timestamp ON memories (timestamp)')
+
+    def canonical(self, key: str) -> str:
+        return key
+
+    def put(self, key: str, record: Dict[str, Any]) -> str:
+        self.put_many([(key, record)])
+        return self.path
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        rows = [(key, json.dumps(record), record['timestamp']) for key, record in items]
+        with self.lock:
+            self.conn.execute('BEGIN')
+            self.conn.executemany('INSERT OR REPLACE INTO memories VALUES (?, ?, ?)', rows)
+            self.conn.execute('COMMIT')
+        return len(rows)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute('SELECT record FROM memories WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, key: str) -> bool:
+        with self.lock:
+            return self.conn.execute('DELETE FROM memories WHERE key = ?', (key,)).rowcount > 0
+
+    def keys(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.conn.execute('SELECT key FROM memories')]
+
+    def timestamps(self) -> Dict[str, float]:
+        with self.lock:
+            return dict(self.conn.execute('SELECT key, timestamp FROM memories').fetchall())
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self.lock:
+            rows = self.conn.execute('SELECT key, record FROM memories WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp',
+                                     (float('-inf') if start is None else start, float('inf') if end is None else end)).fetchall()
+        for key, record in rows:
+            yield key, json.loads(record)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class ShortTermStore:
+    """
+    In-memory LRU store whose items expire ttl seconds after their last access.
+
+    Items live in an OrderedDict kept in access order, so eviction pops the least
+    recently used item in O(1). Expiry times sit in a min-heap; entries made
+    stale by a later access are skipped lazily and the heap is rebuilt once
+    they pile up, so expiring items costs O(log n) each instead of a full scan.
+    """
+
+    def __init__(self, capacity: int = 100, default_ttl: float = 3600):
+        self.capacity = capacity
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()  # {key: {'data': Any, 'timestamp': float, 'ttl': float}}
+        self.heap = []  # [(expires_at, key)]
+
+    def schedule(self, key: str, entry: Dict[str, Any]):
+        heapq.heappush(self.heap, (entry['timestamp'] + entry['ttl'], key))
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [(e['timestamp'] + e['ttl'], k) for k, e in self.entries.items()]
+            heapq.heapify(self.heap)
+
+    def put(self, key: str, data: Any, ttl: Optional[float] = None) -> Dict[str, Any]:
+        self.expire()
+        if key not in self.entries and len(self.entries) >= self.capacity:
+            self.evict()
+        entry = {'data': data, 'timestamp': time.time(), 'ttl': self.default_ttl if ttl is None else ttl}
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.schedule(key, entry)
+        return entry
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get an item's data and mark it as recently used (extending its life).
+        """
+        self.expire()
+        entry = self.entries.get(key)
+        if entry is None:
+            return default
+        entry['timestamp'] = time.time()
+        self.entries.move_to_end(key)
+        self.schedule(key, entry)
+        return entry['data']
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Remove the expired items.
+
+        Returns:
+            Number of items removed
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        while self.heap and self.heap[0][0] < now:
+            expires_at, key = heapq.heappop(self.heap)
+            entry = self.entries.get(key)
+            # skip heap entries superseded by a later access or put
+            if entry is not None and entry['timestamp'] + entry['ttl'] == expires_at:
+                del self.entries[key]
+                removed += 1
+        return removed
+
+    def evict(self) -> Optional[str]:
+        """
+        Remove the least recently used item.
+        """
+        if not self.entries:
+            return None
+        key, _ = self.entries.popitem(last=False)
+        return key
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __delitem__(self, key: str):
+        del self.entries[key]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keys(self):
+        return self.entries.keys()
+
+    def items(self):
+        return self.entries.items()
+
+def in_range(record: Dict[str, Any], start: Optional[float], end: Optional[float]) -> bool:
+    return (start is None or record['timestamp'] >= start) and (end is None or record['timestamp'] <= end)
+
+stores = {'file': FileStore, 'log': LogStore, 'sqlite': SQLiteStore}
+
+def get_store(backend: str = 'log', path: str = '~/.commune/memory/long_term', **kwargs):
+    """
+    Create a long-term memory store.
+
+    Args:
+        backend: 'file' (one JSON file per key), 'log' (append-only log) or 'sqlite'
+        path: Directory holding the store
+    """
+    assert backend in stores, f"Unknown memory backend {backend}, options are {list(stores)}"
+    return stores[backend](path, **kwargs)
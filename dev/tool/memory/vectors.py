@@ -0,0 +1,164 @@
+import os
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+from ...rank import HashedVectors, np
+
+class VectorIndex:
+    """
+    Offline vector index over the long-term memories.
+
+    Each memory is embedded locally as a hashed character n-gram vector (see
+    dev.rank.HashedVectors) and stored as a row of a float32 matrix, so a search
+    is one matrix-vector product and a top-k partition. The matrix is saved next
+    to the long-term store (vectors.npy, optionally loaded memory-mapped) and
+    treated as a cache: on load it is synced with the store's (key, timestamp)
+    pairs and only new or changed memories are embedded again.
+    """
+
+    def __init__(self, path: str, dim: int = 1024, mmap: bool = False, save_every: int = 100):
+        """
+        Initialize the index.
+
+        Args:
+            path: Directory holding vectors.npy and vectors.json
+            dim: Number of hash buckets per vector
+            mmap: Whether to memory-map the saved matrix instead of reading it
+            save_every: Save after this many changes (unsaved ones are re-synced from the store on the next load)
+        """
+        assert np is not None, 'numpy is required for VectorIndex'
+        self.path = os.path.expanduser(path)
+        self.matrix_path = os.path.join(self.path, 'vectors.npy')
+        self.meta_path = os.path.join(self.path, 'vectors.json')
+        self.dim = dim
+        self.save_every = save_every
+        self.embedder = HashedVectors(dim=dim)
+        self.lock = threading.Lock()
+        self.keys = []  # row -> key (None for removed rows)
+        self.stamps = {}  # {key: timestamp}
+        self.key2row = {}
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.pending = []  # rows appended since the matrix was last stacked
+        self.changes = 0
+        self.load(mmap)
+
+    def load(self, mmap: bool = False):
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode='r' if mmap else None)
+        except Exception:
+            return
+        if meta.get('dim') != self.dim or meta.get('version') != HashedVectors.version or len(meta['keys']) != len(matrix):
+            return
+        self.matrix = matrix
+        self.keys = meta['keys']
+        self.stamps = meta['stamps']
+        self.key2row = {key: row for row, key in enumerate(self.keys) if key is not None}
+
+    def save(self) -> Dict[str, Any]:
+        """
+        Write the matrix and its keys, dropping removed rows.
+        """
+        with self.lock:
+            self.stack()
+            live = [row for row, key in enumerate(self.keys) if key is not None]
+            if len(live) < len(self.keys):
+                self.matrix = np.ascontiguousarray(self.matrix[live])
+                self.keys = [self.keys[row] for row in live]
+                self.key2row = {key: row for row, key in enumerate(self.keys)}
+            os.makedirs(self.path, exist_ok=True)
+            # written to a temporary file first, the current one may be memory-mapped
+            tmp_path = self.matrix_path + '.tmp.npy'
+            np.save(tmp_path, np.asarray(self.matrix, dtype=np.float32))
+            os.replace(tmp_path, self.matrix_path)
+            with open(self.meta_path, 'w') as f:
+                json.dump({'dim': self.dim, 'version': HashedVectors.version, 'keys': self.keys, 'stamps': self.stamps}, f)
+            self.changes = 0
+        return {'status': 'success', 'path': self.matrix_path, 'vectors': len(self.key2row)}
+
+    def stack(self):
+        if self.pending:
+            self.matrix = np.vstack([self.matrix, np.stack(self.pending)])
+            self.pending = []
+
+    @staticmethod
+    def text(key: str, data: Any, max_chars: int = 2000) -> str:
+        return f'{key} {str(data)[:max_chars]}'
+
+    def add_many(self, items: Iterable[Tuple[str, Any, float]]) -> int:
+        """
+        Embed and add (or replace) memories.
+
+        Args:
+            items: (key, data, timestamp) triples
+        """
+        count = 0
+        with self.lock:
+            for key, data, timestamp in items:
+                vector = self.embedder.vectorize(self.text(key, data))
+                if key in self.key2row:
+                    self.stack()
+                    if not self.matrix.flags.writeable:
+                        self.matrix = np.array(self.matrix)
+                    self.matrix[self.key2row[key]] = vector
+                else:
+                    self.key2row[key] = len(self.keys)
+                    self.keys.append(key)
+                    self.pending.append(vector)
+                self.stamps[key] = timestamp
+                count += 1
+            self.changes += count
+        if self.changes >= self.save_every:
+            self.save()
+        return count
+
+    def add(self, key: str, data: Any, timestamp: float) -> int:
+        return self.add_many([(key, data, timestamp)])
+
+    def remove(self, key: str) -> bool:
+        with self.lock:
+            row = self.key2row.pop(key, None)
+            if row is None:
+                return False
+            self.keys[row] = None
+            self.stamps.pop(key, None)
+            self.changes += 1
+        return True
+
+    def sync(self, store) -> Dict[str, Any]:
+        """
+        Bring the index in line with a long-term store, embedding only new or changed memories.
+        """
+        stamps = store.timestamps()
+        for key in [k for k in self.key2row if k not in stamps]:
+            self.remove(key)
+        stale = [key for key, ts in stamps.items() if self.stamps.get(key) != ts]
+        records = ((key, store.get(key)) for key in stale)
+        added = self.add_many((key, r['data'], r['timestamp']) for key, r in records if r is not None)
+        if self.changes:
+            self.save()
+        return {'status': 'success', 'added': added, 'vectors': len(self.key2row)}
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the memories most similar to a query by cosine similarity.
+
+        Args:
+            query: Search query
+            k: Number of results
+
+        Returns:
+            List of (key, score) pairs, best first
+        """
+        with self.lock:
+            if not self.key2row:
+                return []
+            self.stack()
+            scores = np.asarray(self.matrix @ self.embedder.vectorize(query))
+            if len(self.keys) > len(self.key2row):
+                scores[[row for row, key in enumerate(self.keys) if key is None]] = -np.inf
+            k = min(k, len(self.key2row))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.keys[row], float(scores[row])) for row in top]
@@ -2,7 +2,13 @@
 import commune as c
 import json
 import os
-from typing import List, Dict, Union, Optional, Any
+import heapq
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Union, Optional, Any, Tuple
+from ..rank import Ranker
+from ..symbols import SymbolIndex
+from ..utils import abspath
 
 print = c.print
 class Select:
@@ -13,7 +19,9 @@ class Select:
     using LLM-based semantic understanding to rank and filter options.
     """
 
-    def __init__(self, provider='dev.model.openrouter'):
+    anchors = ["<START_JSON>", "</END_JSON>"]
+
+    def __init__(self, provider='dev.model.openrouter', cache_dir: str = '~/.commune/dev_cache', cache_size: int = 5000):
         """
         Initialize the Find module.
         
@@ -21,8 +29,14 @@ class Select:
             model: Pre-initialized model instance (optional)
             default_provider: Provider to use if no model is provided
             default_model: Default model to use for ranking
+            cache_dir: Directory holding the symbol index
+            cache_size: Maximum number of file documents kept in memory between calls
         """
         self.model = c.module(provider)()
+        self.symbols = SymbolIndex(cache_dir=cache_dir)
+        self.ranker = Ranker()  # kept across calls, it caches the tokens and vectors of unchanged files
+        self.cache_size = cache_size
+        self.documents = OrderedDict()  # {document_key: text}, so unchanged files are not read again
 
     def forward(self,  
               query: str = 'most relevant', 
@@ -36,7 +50,12 @@ class Select:
               context: Optional[str] = None,
               temperature: float = 0.5,
               allow_selection: bool = False,
-              verbose: bool = True) -> List[str]:
+              verbose: bool = True,
+              k: int = 50,
+              mode: str = 'hybrid',
+              chunk_size: Optional[int] = None,
+              max_workers: int = 8,
+              symbols: bool = True) -> List[str]:
         """
         Find the most relevant options based on a query.
         
@@ -53,14 +72,16 @@ class Select:
             temperature: Temperature for generation (lower = more deterministic)
             allow_selection: Whether to allow user to select files by index
             verbose: Whether to print output during generation
+            k: Number of candidates the local ranker shortlists for the LLM
+            mode: 'hybrid' (local shortlist, then LLM), 'llm' (LLM only) or 'local' (no LLM)
+            chunk_size: If set, score options in batches of this size concurrently
+            max_workers: Number of chunks scored in parallel
+            symbols: Whether to pin the Python files defining or referencing the symbols
+                the query names (see SymbolIndex.identifiers) into the local shortlist
             
         Returns:
             List of the most relevant options
         """
-        
-
-        anchors = ["<START_JSON>", "</END_JSON>"]
-        
         # Convert dict to list if needed
         if isinstance(options, dict):
             idx2options = {i: {'name': k, 'data': options[k]} for i, k in enumerate(options.keys())}
@@ -69,7 +90,86 @@ class Select:
             
         if not idx2options:
             return []
+
+        # Files defining or using the symbols named in the query go to the top of the shortlist
+        pinned = []
+        if symbols and mode != 'llm':
+            path2idx = {abspath(o): i for i, o in idx2options.items() if isinstance(o, str) and o.endswith('.py')}
+            hits = self.symbols.lookup(query, list(path2idx)) if path2idx else []
+            pinned = [path2idx[path] for path, _ in hits[:k]]
+            if hits and verbose:
+                print(f"Found {len(hits)} files by symbol", color="cyan")
+
+        # Shortlist locally so the LLM only re-ranks the top k candidates
+        if mode == 'local' or (mode == 'hybrid' and len(idx2options) > k):
+            keys = [self.document_key(option) for option in idx2options.values()]
+            docs = [self.document(option, key) for option, key in zip(idx2options.values(), keys)]
+            idxs = list(idx2options.keys())
+            ranked = self.ranker.forward(query, docs, k=n if mode == 'local' else k, keys=keys)
+            if mode == 'local':
+                shortlist = list(dict.fromkeys(pinned + [idxs[i] for i, score in ranked if score > 0]))[:n]
+                return [idx2options[i] for i in shortlist]
+            shortlist = list(dict.fromkeys(pinned + [idxs[i] for i, score in ranked]))[:k]
+            idx2options = {i: idx2options[i] for i in shortlist}
+            if verbose:
+                print(f"Shortlisted {len(idx2options)} of {len(docs)} options", color="cyan")
+            
+        # Score in one prompt, or in concurrent fixed-size chunks for large option sets
+        idxs = list(idx2options.keys())
+        params = dict(query=query, n=n, min_score=min_score, max_score=max_score, threshold=threshold,
+                      model=model, context=context, temperature=temperature, trials=trials)
+        if chunk_size and len(idxs) > chunk_size:
+            chunks = [{i: idx2options[i] for i in idxs[j:j + chunk_size]} for j in range(0, len(idxs), chunk_size)]
+            if verbose:
+                print(f"Scoring {len(idxs)} options in {len(chunks)} chunks of {chunk_size}", color="cyan")
+            scores = []
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(self.score, chunk, verbose=False, **params) for chunk in chunks]
+                for future in futures:
+                    try:
+                        scores += future.result()
+                    except ValueError as e:
+                        print(f"Skipping chunk: {e}", color="red")
+        else:
+            scores = self.score(idx2options, verbose=verbose, **params)
+
+        # Keep the global top n across all chunks
+        filtered_options = [(idx, idx2options[idx]) for idx, score in heapq.nlargest(n, scores, key=lambda x: x[1])]
+        if verbose:
+            print(f"Found {len(filtered_options)} relevant options", color="green")
+
+        # Allow user to select files by index if requested
+        if allow_selection and filtered_options:
+            selected_options = self.select_by_index(filtered_options, verbose)
+            return [option[1] for option in selected_options]
+
+        return [option[1] for option in filtered_options]
+
+    def score(self,
+              idx2options: Dict[int, Any],
+              query: str = 'most relevant',
+              n: int = 10,
+              min_score: int = 0,
+              max_score: int = 10,
+              threshold: int = 5,
+              model: str = None,
+              context: Optional[str] = None,
+              temperature: float = 0.5,
+              trials: int = 3,
+              verbose: bool = True) -> List[Tuple[int, int]]:
+        """
+        Ask the LLM to score a set of options, retrying only this set on a bad response.
+        
+        Args:
+            idx2options: Options to score, keyed by their global index
+            trials: Number of retry attempts if the response cannot be parsed
+            (other arguments as in forward)
             
+        Returns:
+            List of (idx, score) pairs with score >= threshold
+        """
+        anchors = self.anchors
+
         # Format context if provided
         context_str = f"\nCONTEXT:\n{context}" if context else ""
         
@@ -120,39 +220,72 @@ class Select:
                 
             result = json.loads(json_str)
             
-            # Validate the response structure
-            if not isinstance(result, dict) or "data" not in result:
-                if verbose:
-                    print("Invalid response format, missing 'data' field", color="red")
-                result = {"data": []}
-                
-            # Filter and convert to final output format
-            filtered_options = []
-            for item in result["data"]:
-                if isinstance(item, dict) and "idx" in item and "score" in item:
-                    idx, score = item["idx"], item["score"]
-                    if score >= threshold and idx in idx2options:
-                        filtered_options.append((idx, idx2options[idx]))
-                        
-            if verbose:
-                print(f"Found {len(filtered_options)} relevant options", color="green")
-            
-            # Allow user to select files by index if requested
-            if allow_selection and filtered_options:
-                selected_options = self.select_by_index(filtered_options, verbose)
-                return [option[1] for option in selected_options]
-            
-            return [option[1] for option in filtered_options]
-            
         except json.JSONDecodeError as e:
             if verbose:
                 print(f"JSON parsing error: {e}", color="red")
                 print(f"Raw output: {output}", color="red")
             if trials > 0:
                 print(f"Retrying... ({trials} attempts left)", color="yellow")
-                return self.forward(options, query, n, trials - 1, min_score, max_score, threshold, model, context, temperature, allow_selection, verbose)
+                return self.score(idx2options, query=query, n=n, min_score=min_score, max_score=max_score,
+                                  threshold=threshold, model=model, context=context, temperature=temperature,
+                                  trials=trials - 1, verbose=verbose)
             raise ValueError(f"Failed to parse LLM response as JSON: {e}")
+
+        # Validate the response structure
+        if not isinstance(result, dict) or "data" not in result:
+            if verbose:
+                print("Invalid response format, missing 'data' field", color="red")
+            result = {"data": []}
+
+        scores = []
+        for item in result["data"]:
+            if isinstance(item, dict) and "idx" in item and "score" in item:
+                idx, score = item["idx"], item["score"]
+                if score >= threshold and idx in idx2options:
+                    scores.append((idx, score))
+        return scores
     
+    def document(self, option: Any, key: Optional[tuple] = None, max_chars: int = 20000) -> str:
+        """
+        Text the local ranker scores an option by: the option itself plus,
+        for file paths, the head of the file.
+        
+        Args:
+            option: Option to describe
+            key: The option's document_key; documents with a key are cached until the file changes
+            max_chars: Maximum number of file characters to include
+            
+        Returns:
+            Text describing the option
+        """
+        if key is not None and key in self.documents:
+            self.documents.move_to_end(key)
+            return self.documents[key]
+        text = str(option)
+        if isinstance(option, str) and os.path.isfile(option):
+            try:
+                with open(option, 'r', encoding='utf-8', errors='ignore') as f:
+                    text += '\n' + f.read(max_chars)
+            except OSError:
+                pass
+        if key is not None:
+            self.documents[key] = text
+            while len(self.documents) > self.cache_size:
+                self.documents.popitem(last=False)
+        return text
+
+    def document_key(self, option: Any) -> Optional[tuple]:
+        """
+        Cache key of a file option's document, (path, mtime, size); None for other options.
+        """
+        if not isinstance(option, str):
+            return None
+        try:
+            stat = os.stat(option)
+        except (OSError, ValueError):
+            return None
+        return (option, stat.st_mtime, stat.st_size)
+
     def select_by_index(self, options, verbose=True):
         """
         Allow user to select files by index from a list of options.
@@ -2,7 +2,14 @@
 import commune as c
 import json
 import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Union, Optional, Any
+from ..utils import read_text, is_binary_file, calculate_file_hash
+from ..cache import Cache
+from ..tokens import chunk_text
+from ..index import RepoIndex
+from ..repomap import RepoMap
 
 print = c.print
 class Summarize:
@@ -13,8 +20,14 @@ class Summarize:
     using LLM-based semantic understanding to rank and filter options.
     """
 
+    prompt_version = 1  # bump whenever the prompt changes, so cached results are not reused
+
     
-    def __init__(self, provider='dev.model.openrouter'):
+    def __init__(self, 
+                 provider='dev.model.openrouter', 
+                 cache_dir: str = '~/.commune/dev_cache', 
+                 cache_size: int = 10000, 
+                 cache_bytes: int = 256_000_000):
         """
         Initialize the Find module.
         
@@ -22,9 +35,32 @@ class Summarize:
             model: Pre-initialized model instance (optional)
             default_provider: Provider to use if no model is provided
             default_model: Default model to use for ranking
+            cache_dir: Directory holding the summary cache (summaries.sqlite)
+            cache_size: Maximum number of cached summaries
+            cache_bytes: Maximum total size of the cached summaries in bytes
         """
         self.model = c.module(provider)()
         self.anchors = ["<START_JSON>", "</END_JSON>"]
+        self.cache_dir = cache_dir
+        self.cache = Cache(os.path.join(cache_dir, 'summaries.sqlite'), max_entries=cache_size, max_bytes=cache_bytes)
+        self.path2hash = {}  # {path: (mtime, size, hash)} so unchanged files are not re-read to be hashed
+
+    def content_hash(self, path: str) -> str:
+        """
+        SHA-256 of a file's content, recomputed only when its mtime or size changes.
+        """
+        stat = os.stat(path)
+        entry = self.path2hash.get(path)
+        if entry is None or entry[:2] != (stat.st_mtime, stat.st_size):
+            entry = (stat.st_mtime, stat.st_size, calculate_file_hash(path))
+            self.path2hash[path] = entry
+        return entry[2]
+
+    def stats(self):
+        """
+        Report the summary cache's size and hit rate.
+        """
+        return self.cache.stats()
 
     def forward(self,  
               path: str = __file__, # Path to the file containing options or a file  
@@ -32,18 +68,144 @@ class Summarize:
               model: str = None,
               temperature: float = 0.5,
               task = None,
+              max_bytes: int = 1_000_000,
+              cache: bool = True,
+              chunk_tokens: int = 4000,
+              concurrency: int = 8,
               verbose: bool = True) -> List[str]:
-        anchors = self.anchors
+        """
+        Summarize a file into a list of dict(obj, desc), or a directory into a repo map.
+        
+        Files longer than chunk_tokens are split along syntactic boundaries
+        (top-level defs and classes for Python, line windows otherwise), the
+        chunks are summarized concurrently and their lists are concatenated in
+        file order. Each chunk's result is cached by the chunk's hash, so after
+        an edit only the edited chunks are summarized again.
+        
+        Args:
+            path: File to summarize
+            query: What to focus the summary on
+            model: Model to use
+            temperature: Sampling temperature
+            max_bytes: Maximum number of bytes read from the file
+            cache: Whether to use the summary cache
+            chunk_tokens: Maximum number of tokens of content per prompt
+            concurrency: Maximum number of chunks summarized at once
+            verbose: Whether to print the response
+        
+        Returns:
+            The file's summary, or for a directory a dict mapping each file to its summary
+        """
         # Format context if provided
         assert os.path.exists(path), f"File not found: {path}"
+        if os.path.isdir(path):
+            self.summarize_dir(path, query=query, model=model, temperature=temperature, max_bytes=max_bytes,
+                               cache=cache, chunk_tokens=chunk_tokens, max_workers=concurrency, verbose=verbose)
+            return {file: entry['summary'] for file, entry in RepoMap(path, self.cache_dir, query=query).files.items()}
         assert os.path.isfile(path), f"Path is not a file: {path}"
-        content = c.text(path)
+        assert not is_binary_file(path), f"Path is a binary file: {path}"
 
-        # hash
-        cache_path = 'reuslts/' + c.hash(path)
+        # results are keyed by what the prompt is built from, not by the path
+        key = Cache.key('summarize', self.content_hash(path), query, model, max_bytes, chunk_tokens, self.prompt_version)
+        if cache:
+            result = self.cache.get(key)
+            if result is not None:
+                if verbose:
+                    print(f"Cached summary for {path}", color="cyan")
+                return result
+        content = read_text(path, max_bytes=max_bytes)
+        chunks = self.chunks(content, path, chunk_tokens, model=model)
+        if len(chunks) == 1:
+            result = self.summarize(content, query=query, model=model, temperature=temperature, verbose=verbose)
+        else:
+            if verbose:
+                print(f"Summarizing {path} in {len(chunks)} chunks", color="cyan")
+            def call(chunk):
+                start, text = chunk
+                chunk_key = Cache.key('summarize_chunk', hashlib.sha256(text.encode()).hexdigest(), query, model, self.prompt_version)
+                if cache:
+                    chunk_result = self.cache.get(chunk_key)
+                    if chunk_result is not None:
+                        return chunk_result
+                header = f"(lines {start + 1}-{start + text.count(chr(10))} of {os.path.basename(path)})\n"
+                chunk_result = self.summarize(header + text, query=query, model=model, temperature=temperature, verbose=False)
+                if cache:
+                    self.cache.put(chunk_key, chunk_result)
+                return chunk_result
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                result = [item for chunk_result in pool.map(call, chunks) for item in chunk_result]
+        if cache:
+            self.cache.put(key, result)
+    
+        return result
 
-        # Build the prompt
+    def summarize_dir(self,
+                      path: str = './',
+                      query: str = 'most relevant',
+                      model: str = None,
+                      temperature: float = 0.5,
+                      max_bytes: int = 1_000_000,
+                      cache: bool = True,
+                      chunk_tokens: int = 4000,
+                      max_workers: int = 8,
+                      save_every: int = 20,
+                      verbose: bool = True) -> Dict[str, Any]:
+        """
+        Summarize every text file under a directory into a persistent repo map.
+        
+        Binary files are skipped, files are summarized in parallel (at most
+        max_workers at a time) and only files that changed since the map was
+        last updated are summarized again. The map is saved as it fills up, so
+        an interrupted run resumes where it stopped.
+        
+        Args:
+            path: Directory to summarize
+            max_workers: Maximum number of files summarized at once
+            save_every: Save the map after this many summarized files
+            (other args as in forward)
+            
+        Returns:
+            Dictionary with the map path and the number of mapped, summarized and failed files
+        """
+        files = RepoIndex(cache_dir=self.cache_dir).files(path)
+        repo_map = RepoMap(path, self.cache_dir, query=query)
+        repo_map.prune(files)
+        stale = repo_map.stale(files)
+        if verbose:
+            print(f"Summarizing {len(stale)} of {len(files)} files in {repo_map.root}", color="cyan")
+        def call(file):
+            stat = None
+            try:
+                stat = os.stat(file)  # a file deleted mid-run is recorded as failed
+                return file, stat, self.forward(file, query=query, model=model, temperature=temperature, max_bytes=max_bytes,
+                                                cache=cache, chunk_tokens=chunk_tokens, concurrency=1, verbose=False)
+            except Exception as e:
+                return file, stat, e
+        failed = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for i, (file, stat, result) in enumerate(pool.map(call, stale)):
+                if isinstance(result, Exception):
+                    failed[file] = str(result)
+                    if verbose:
+                        print(f"Failed to summarize {file}: {result}", color="red")
+                    continue
+                # recorded with the stat taken before reading, so a file edited meanwhile stays stale
+                repo_map.update(file, result, stat)
+                if (i + 1) % save_every == 0:
+                    repo_map.save()
+        repo_map.save()
+        return {
+            'path': repo_map.path,
+            'files': len(repo_map.files),
+            'summarized': len(stale) - len(failed),
+            'failed': failed
+        }
 
+    def summarize(self, content: str, query: str = 'most relevant', model: str = None, temperature: float = 0.5, verbose: bool = True) -> List[Dict[str, str]]:
+        """
+        Summarize a piece of content with a single model call.
+        """
+        anchors = self.anchors
         prompt = f'''
         TASK
         - summarize the follwoing based on the format based on the wquery 
@@ -74,6 +236,14 @@ class Summarize:
         if verbose:
             print("\nParsing response...", color="cyan")
             
-        result =   json.loads(output)
-    
-        return result
+        return json.loads(output)
+
+    def chunks(self, content: str, path: str = '', max_tokens: int = 4000, model: str = None) -> List[tuple]:
+        """
+        Split content into chunks of at most max_tokens whose boundaries stay put
+        under local edits (see dev.tokens.chunk_text).
+        
+        Returns:
+            List of (start_line, text) with 0-based start lines
+        """
+        return chunk_text(content, path, max_tokens, model=model)
@@ -2,9 +2,13 @@
 import commune as c
 import json
 import os
+import ast
 from typing import List, Dict, Union, Optional, Any
 import importlib
 import inspect
+import functools
+import threading
+from ..utils import abspath, load_json, save_json
 
 print = c.print
 
@@ -19,10 +23,19 @@ class Tool:
     This module helps organize and access tools within the dev.tool namespace,
     with the ability to automatically select the most relevant tool for a given task.
     """
-    def __init__(self, model='dev.model.openrouter', prefix='dev.tool'):
+    instances = {}  # {tool: (mtime, instance)} shared by every toolbox in the process
+    instances_lock = threading.Lock()
+
+    def __init__(self, model='dev.model.openrouter', prefix='dev.tool', cache_dir='~/.commune/dev_cache'):
 
         self.prefix = prefix
-        self.model = c.module(model)()
+        self.model_path = model
+        self.schema_path = os.path.join(abspath(cache_dir), 'tool2schema.json')
+        self._tool2path = None
+
+    @functools.cached_property
+    def model(self):
+        return c.module(self.model_path)()
 
     def forward(
         self, 
@@ -71,7 +84,51 @@ class Tool:
 
 
     def tools(self) -> List[str]:
-        return [t for t in  c.mods() if t.startswith(self.prefix)]
+        return list(self.tool2path().keys())
+
+    def tool2path(self) -> Dict[str, str]:
+        """
+        Map each tool to its source file, discovered once from the source tree without importing anything.
+        
+        Returns:
+            Dict[str, str]: Dictionary mapping tool names to their source files.
+        """
+        if self._tool2path is None:
+            root = os.path.dirname(os.path.abspath(__file__))
+            tool2path = {}
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith(('.', '__')))
+                for filename in sorted(filenames):
+                    if not filename.endswith('.py') or filename.startswith('__'):
+                        continue
+                    parts = os.path.relpath(os.path.join(dirpath, filename[:-3]), root).split(os.sep)
+                    if parts == [os.path.basename(root)]:
+                        continue  # the toolbox itself
+                    if len(parts) > 1 and parts[-1] == parts[-2]:
+                        parts = parts[:-1]  # memory/memory.py -> memory
+                    tool2path['.'.join([self.prefix] + parts)] = os.path.join(dirpath, filename)
+            self._tool2path = tool2path
+        return self._tool2path
+
+    def get(self, tool: str) -> Any:
+        """
+        Get an instance of a tool, reusing the cached one until its source file changes.
+        
+        Args:
+            tool (str): The name of the tool.
+        
+        Returns:
+            Any: The tool instance.
+        """
+        path = self.tool2path().get(tool)
+        mtime = os.path.getmtime(path) if path else None
+        with self.instances_lock:
+            if tool in self.instances and self.instances[tool][0] == mtime:
+                return self.instances[tool][1]
+        instance = c.module(tool)()
+        with self.instances_lock:
+            self.instances[tool] = (mtime, instance)
+        return instance
 
 
     def tool2code(self) -> str:
@@ -85,16 +142,51 @@ class Tool:
         """
         Map each tool to its schema.
         
+        Schemas are cached on disk keyed by the tool's source file mtime, so only
+        tools whose source changed are imported and introspected again. Modules
+        without a forward function are not tools and are left out (without being
+        imported). A tool whose schema fails to load is reported and not cached,
+        so it is retried on the next call.
+        
         Returns:
             Dict[str, str]: Dictionary mapping tool names to their schemas.
         """
-        tool2schema = {}
-        for tool in self.tools():
-            tool2schema[tool] = self.schema(tool)
-            tool2schema[tool].pop('name', None)
-            tool2schema[tool].pop('format', None)
-        return tool2schema
+        try:
+            cache = load_json(self.schema_path)
+        except Exception:
+            cache = {}
+        entries = {}
+        for tool, path in self.tool2path().items():
+            mtime = os.path.getmtime(path)
+            entry = cache.get(tool)
+            if entry is None or entry['mtime'] != mtime:
+                schema = None
+                if self.defines_fn(path):
+                    try:
+                        schema = self.schema(tool)
+                        schema.pop('name', None)
+                        schema.pop('format', None)
+                    except Exception as e:
+                        print(f"Failed to load the schema of {tool}: {type(e).__name__}: {e}", color="red")
+                        continue
+                entry = {'path': path, 'mtime': mtime, 'schema': schema}
+            entries[tool] = entry
+        if entries != cache:
+            save_json(entries, self.schema_path)
+        return {tool: entry['schema'] for tool, entry in entries.items() if entry['schema'] is not None}
     
+    def defines_fn(self, path: str) -> bool:
+        """
+        Whether a source file defines the tool function (e.g. forward), checked with ast.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            return True  # let schema() report the problem
+        return any(isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == self.fn
+                   for node in ast.walk(tree))
+
     def schema(self, tool: str,) -> Dict[str, str]:
         """
         Get the schema for a specific tool.
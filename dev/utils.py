@@ -1,12 +1,42 @@
 
 import os
-import glob
 import json
+import mmap
+import codecs
 import shutil
 import hashlib
+import importlib
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from typing import Dict, List, Union, Optional, Any, Tuple
+from .ignore import GitIgnore, compile_patterns, is_ignored
+
+class LazyModule:
+    """
+    Proxy for a module that is only imported when one of its attributes is first used.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+def lazy_import(name):
+    """
+    Defer importing a (heavy) module until it is actually used.
+    
+    Args:
+        name: Module name, e.g. 'commune'
+        
+    Returns:
+        A proxy that imports the module on first attribute access
+    """
+    return LazyModule(name)
 
 def abspath(path):
     """
@@ -45,33 +75,136 @@ def put_text(path, text):
         f.write(text)
     return {'path': path, 'text': text}
 
-def get_text(path):
+def get_text(path, max_bytes=None, max_total_bytes=None):
     """
     Read text from a file.
     
     Args:
-        path: Path to the file
+        path: Path to the file (or a directory, to read every text file under it)
+        max_bytes: Maximum number of bytes read per file
+        max_total_bytes: Maximum number of bytes read in total (directories only)
         
     Returns:
-        Text content of the file
+        Text content of the file, or a dict of path to text for a directory
     """
     if os.path.isdir(path):
-        file2text = {}
-        for root, _, files in os.walk(path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if os.path.isfile(file_path):
-                    path = os.path.abspath(file_path)
-                    file2text[file_path] = get_text(file_path)
-        return file2text
+        return dict(iter_texts(path, max_bytes=max_bytes, max_total_bytes=max_total_bytes))
     else:
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_text(path, max_bytes=max_bytes)
         except Exception as e:
             print(f"Error reading file {path}: {e}")
             return None
 
+def iter_chunks(path, chunk_size=1 << 16, max_bytes=None):
+    """
+    Lazily read a text file in chunks through a memory map.
+    
+    Only the pages that are actually consumed are paged in, so callers can stop
+    early on large files without reading them whole. Multi-byte characters that
+    straddle a chunk boundary are decoded intact.
+    
+    Args:
+        path: Path to the file
+        chunk_size: Number of bytes decoded per chunk
+        max_bytes: Stop after this many bytes (None for the whole file)
+        
+    Yields:
+        Decoded text chunks
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if max_bytes is None else min(size, max_bytes)
+        if end <= 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, end, chunk_size):
+                text = decoder.decode(mm[start:min(start + chunk_size, end)])
+                if text:
+                    yield text
+    # a character cut by max_bytes is dropped rather than replaced
+    if end == size:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+def iter_lines(path, start=0, end=None, max_bytes=None):
+    """
+    Lazily read a range of lines from a text file through a memory map.
+    
+    Args:
+        path: Path to the file
+        start: First line to yield (0-based)
+        end: Line to stop before (None for the end of the file)
+        max_bytes: Stop once this many bytes have been scanned
+        
+    Yields:
+        (line_number, line) tuples, lines keep their trailing newline
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lineno = 0
+            while end is None or lineno < end:
+                if max_bytes is not None and mm.tell() >= max_bytes:
+                    break
+                line = mm.readline()
+                if not line:
+                    break
+                if lineno >= start:
+                    yield lineno, line.decode('utf-8', errors='replace')
+                lineno += 1
+
+def read_text(path, max_bytes=None):
+    """
+    Read (at most max_bytes of) a text file.
+    
+    Args:
+        path: Path to the file
+        max_bytes: Maximum number of bytes to read (None for the whole file)
+        
+    Returns:
+        Text content of the file
+    """
+    return ''.join(iter_chunks(path, max_bytes=max_bytes))
+
+def iter_texts(path, max_bytes=None, max_total_bytes=None, skip_binary=True, ignore_patterns=None):
+    """
+    Lazily read the text files under a directory within a byte budget.
+    
+    Binary files are skipped up front by sniffing their first KB, files are
+    truncated to max_bytes and iteration stops once max_total_bytes were read.
+    
+    Args:
+        path: File or directory to read
+        max_bytes: Maximum number of bytes read per file
+        max_total_bytes: Maximum number of bytes read in total
+        skip_binary: Whether to skip binary files
+        ignore_patterns: Patterns to ignore (see list_files)
+        
+    Yields:
+        (path, text) tuples
+    """
+    paths = [path] if os.path.isfile(path) else list_files(path, ignore_patterns=ignore_patterns)
+    total = 0
+    for file_path in paths:
+        if max_total_bytes is not None and total >= max_total_bytes:
+            break
+        if skip_binary and is_binary_file(file_path):
+            continue
+        limit = max_bytes
+        if max_total_bytes is not None:
+            limit = max_total_bytes - total if limit is None else min(limit, max_total_bytes - total)
+        try:
+            size = os.path.getsize(file_path)
+            text = read_text(file_path, max_bytes=limit)
+        except (OSError, ValueError):
+            continue
+        total += size if limit is None else min(size, limit)
+        yield file_path, text
+
 def ensure_directory_exists(directory_path):
     """
     Ensure that a directory exists, creating it if necessary.
@@ -86,7 +219,9 @@ def list_files(directory,
               pattern="*", 
               recursive=True, 
               ignore_patterns=None,
-              max_size=None):
+              max_size=None,
+              gitignore=True,
+              max_workers=None):
     """
     List files in a directory matching a pattern.
     
@@ -96,34 +231,121 @@ def list_files(directory,
         recursive: Whether to search recursively
         ignore_patterns: Patterns to ignore
         max_size: Maximum file size in bytes
+        gitignore: Whether to honour .gitignore files (and skip .git)
+        max_workers: Number of threads scanning directories (None to scan sequentially)
         
     Returns:
         List of file paths
     """
-    ignore_patterns = ignore_patterns or []
-    
-    if recursive:
-        matches = []
-        for root, dirnames, filenames in os.walk(directory):
-            # Filter out directories to ignore
-            for ignore_pattern in ignore_patterns:
-                dirnames[:] = [d for d in dirnames if not glob.fnmatch.fnmatch(d, ignore_pattern)]
-            
-            for filename in filenames:
-                if glob.fnmatch.fnmatch(filename, pattern) and not any(
-                    glob.fnmatch.fnmatch(filename, ignore) for ignore in ignore_patterns
-                ):
-                    file_path = os.path.join(root, filename)
-                    if max_size is None or os.path.getsize(file_path) <= max_size:
-                        matches.append(file_path)
-        return matches
-    else:
-        return [
-            f for f in glob.glob(os.path.join(directory, pattern))
-            if os.path.isfile(f) and not any(
-                glob.fnmatch.fnmatch(os.path.basename(f), ignore) for ignore in ignore_patterns
-            ) and (max_size is None or os.path.getsize(f) <= max_size)
-        ]
+    return list(walk_files(directory,
+                           pattern=pattern,
+                           recursive=recursive,
+                           ignore_patterns=ignore_patterns,
+                           max_size=max_size,
+                           gitignore=gitignore,
+                           max_workers=max_workers))
+
+def scan_dir(dirpath, ignores, match, ignore, max_size, gitignore):
+    """
+    Scan a single directory for walk_files.
+    
+    Returns:
+        (files, subdirs) where subdirs is a list of (path, ignores) to scan next
+    """
+    if gitignore:
+        found = GitIgnore.from_file(os.path.join(dirpath, '.gitignore'))
+        if found is not None:
+            ignores = ignores + (found,)
+    files, subdirs = [], []
+    try:
+        it = os.scandir(dirpath)
+    except OSError:
+        return files, subdirs
+    with it:
+        for entry in it:
+            name = entry.name
+            if ignore is not None and ignore(name):
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if is_dir:
+                    if gitignore and name == '.git':
+                        continue
+                    if ignores and is_ignored(ignores, entry.path, is_dir=True):
+                        continue
+                    subdirs.append((entry.path, ignores))
+                elif entry.is_file():
+                    if not match(name):
+                        continue
+                    if ignores and is_ignored(ignores, entry.path):
+                        continue
+                    if max_size is not None and entry.stat().st_size > max_size:
+                        continue
+                    files.append(entry.path)
+            except OSError:
+                continue
+    return files, subdirs
+
+def walk_files(directory,
+               pattern="*",
+               recursive=True,
+               ignore_patterns=None,
+               max_size=None,
+               gitignore=True,
+               max_workers=None):
+    """
+    Lazily walk the files in a directory matching a pattern.
+    
+    Uses os.scandir (so file types come from the directory listing, and sizes
+    are only stat'ed when max_size is set), matches all ignore patterns with a
+    single compiled regex and applies .gitignore files found along the way.
+    With max_workers, subdirectories are scanned on a thread pool and files
+    are yielded as soon as their directory was scanned (in no particular order).
+    
+    Args:
+        directory: Directory to search
+        pattern: Glob pattern to match
+        recursive: Whether to search recursively
+        ignore_patterns: Patterns to ignore (matched against file and directory names)
+        max_size: Maximum file size in bytes
+        gitignore: Whether to honour .gitignore files (and skip .git)
+        max_workers: Number of threads scanning directories (None to scan sequentially)
+        
+    Yields:
+        File paths
+    """
+    match = compile_patterns([pattern])
+    ignore = compile_patterns(ignore_patterns)
+    ignores = ()
+    if gitignore:
+        # .gitignore files of parent directories up to the repository root also apply
+        parents = []
+        parent = os.path.abspath(directory)
+        while not os.path.exists(os.path.join(parent, '.git')) and parent != os.path.dirname(parent):
+            parent = os.path.dirname(parent)
+            found = GitIgnore.from_file(os.path.join(parent, '.gitignore'))
+            if found is not None:
+                parents.append(found)
+        if os.path.exists(os.path.join(parent, '.git')):
+            ignores = tuple(reversed(parents))
+    scan = lambda dirpath, ignores: scan_dir(dirpath, ignores, match, ignore, max_size, gitignore)
+    if not max_workers:
+        stack = [(directory, ignores)]
+        while stack:
+            files, subdirs = scan(*stack.pop())
+            yield from files
+            if recursive:
+                stack.extend(reversed(subdirs))
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(scan, directory, ignores)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                yield from files
+                if recursive:
+                    pending |= {pool.submit(scan, *subdir) for subdir in subdirs}
 
 def detect_project_type(directory):
     """
@@ -251,32 +473,32 @@ def run_command(command, cwd=None, capture_output=True):
             'success': False
         }
 
-def find_files_by_content(directory, search_text, file_pattern="*", ignore_patterns=None):
+def find_files_by_content(directory, 
+                          search_text, 
+                          file_pattern="*", 
+                          ignore_patterns=None, 
+                          regex=False, 
+                          cache_dir='~/.commune/dev_cache'):
     """
     Find files containing specific text.
     
+    Queries go through a persistent trigram index (see dev.search.ContentIndex),
+    so only files that can contain the text are read.
+    
     Args:
         directory: Directory to search
         search_text: Text to search for
         file_pattern: File pattern to match
         ignore_patterns: Patterns to ignore
+        regex: Whether search_text is a regular expression
+        cache_dir: Directory holding the index
         
     Returns:
-        List of file paths containing the search text
+        List of (absolute) file paths containing the search text
     """
-    matching_files = []
-    files = list_files(directory, pattern=file_pattern, ignore_patterns=ignore_patterns)
-    
-    for file_path in files:
-        try:
-            content = get_text(file_path)
-            if search_text in content:
-                matching_files.append(file_path)
-        except:
-            # Skip files that can't be read as text
-            pass
-    
-    return matching_files
+    from .search import ContentIndex
+    index = ContentIndex.shared(cache_dir)
+    return index.search(directory, search_text, regex=regex, file_pattern=file_pattern, ignore_patterns=ignore_patterns)
 
 def diff_files(file1, file2):
     """
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark dev.utils.list_files against the previous os.walk/fnmatch implementation
+on a synthetic tree.
+
+    python scripts/bench_list_files.py --dirs 500 --files 40
+"""
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.utils import list_files
+
+IGNORE = ['__pycache__', '*.pyc', 'node_modules', '*.log', 'dist']
+
+def list_files_walk(directory, pattern="*", ignore_patterns=None, max_size=None):
+    # the single-threaded os.walk implementation list_files replaced
+    ignore_patterns = ignore_patterns or []
+    matches = []
+    for root, dirnames, filenames in os.walk(directory):
+        for ignore_pattern in ignore_patterns:
+            dirnames[:] = [d for d in dirnames if not glob.fnmatch.fnmatch(d, ignore_pattern)]
+        for filename in filenames:
+            if glob.fnmatch.fnmatch(filename, pattern) and not any(
+                glob.fnmatch.fnmatch(filename, ignore) for ignore in ignore_patterns
+            ):
+                file_path = os.path.join(root, filename)
+                if max_size is None or os.path.getsize(file_path) <= max_size:
+                    matches.append(file_path)
+    return matches
+
+def build_tree(root, dirs, files, depth=4):
+    exts = ['.py', '.pyc', '.js', '.md', '.log']
+    for d in range(dirs):
+        parts = [f'd{(d >> (3 * i)) % 8}' for i in range(depth)] + [f'leaf{d}']
+        dirpath = os.path.join(root, *parts)
+        os.makedirs(dirpath, exist_ok=True)
+        for f in range(files):
+            with open(os.path.join(dirpath, f'f{f}{exts[f % len(exts)]}'), 'w') as fh:
+                fh.write('x' * (f * 10))
+    os.makedirs(os.path.join(root, '__pycache__'), exist_ok=True)
+
+def timeit(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        n = len(fn())
+        times.append((time.perf_counter() - start) * 1000)
+    return n, min(times), statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dirs', type=int, default=500)
+    parser.add_argument('--files', type=int, default=40)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max_size', type=int, default=None)
+    args = parser.parse_args()
+    root = tempfile.mkdtemp()
+    try:
+        build_tree(root, args.dirs, args.files)
+        cases = {
+            'os.walk (old)': lambda: list_files_walk(root, ignore_patterns=IGNORE, max_size=args.max_size),
+            'scandir': lambda: list_files(root, ignore_patterns=IGNORE, max_size=args.max_size),
+            'scandir x4 threads': lambda: list_files(root, ignore_patterns=IGNORE, max_size=args.max_size, max_workers=4),
+            'scandir x16 threads': lambda: list_files(root, ignore_patterns=IGNORE, max_size=args.max_size, max_workers=16),
+        }
+        print(f'tree: {args.dirs} dirs x {args.files} files')
+        for name, fn in cases.items():
+            n, best, median = timeit(fn, args.runs)
+            print(f'{name:<22} {n:7d} files   min {best:8.1f} ms   median {median:8.1f} ms')
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the short-term memory store against the previous dict
+implementation (full expiry scan per call, min() scan per eviction).
+
+    python scripts/bench_short_term.py --sizes 1000 10000 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.tool.memory.store import ShortTermStore
+
+class DictStore:
+    # the implementation ShortTermStore replaced
+    def __init__(self, capacity, default_ttl=3600):
+        self.capacity = capacity
+        self.default_ttl = default_ttl
+        self.entries = {}
+
+    def fill(self, n):
+        # filled directly, put() alone would take O(n^2)
+        now = time.time()
+        self.entries = {f'k{i}': {'data': i, 'timestamp': now, 'ttl': self.default_ttl} for i in range(n)}
+
+    def expire(self):
+        now = time.time()
+        expired = [k for k, v in self.entries.items() if now > v['timestamp'] + v['ttl']]
+        for k in expired:
+            del self.entries[k]
+
+    def put(self, key, data, ttl=None):
+        self.expire()
+        if len(self.entries) >= self.capacity:
+            oldest = min(self.entries, key=lambda k: self.entries[k]['timestamp'])
+            del self.entries[oldest]
+        self.entries[key] = {'data': data, 'timestamp': time.time(), 'ttl': self.default_ttl if ttl is None else ttl}
+
+    def get(self, key):
+        self.expire()
+        if key in self.entries:
+            self.entries[key]['timestamp'] = time.time()
+            return self.entries[key]['data']
+
+def run(store, n, ops):
+    if isinstance(store, DictStore):
+        store.fill(n)
+    else:
+        for i in range(n):
+            store.put(f'k{i}', i)
+    keys = [f'k{random.randrange(2 * n)}' for _ in range(ops)]
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        if i % 2:
+            store.get(key)
+        else:
+            store.put(key, i)  # evicts, since the store is full
+    return (time.perf_counter() - start) / ops * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 100000])
+    parser.add_argument('--ops', type=int, default=1000)
+    parser.add_argument('--skip_baseline_above', type=int, default=100000, help='only time the new store above this size')
+    args = parser.parse_args()
+    random.seed(0)
+    for n in args.sizes:
+        new = run(ShortTermStore(capacity=n), n, args.ops)
+        line = f'{n:>8} entries   ShortTermStore {new:8.2f} us/op'
+        if n <= args.skip_baseline_above:
+            old = run(DictStore(capacity=n), n, args.ops)
+            line += f'   dict {old:10.2f} us/op   speedup {old / new:8.1f}x'
+        print(line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Compare the prompt tokens of whole-file context with snippet context
+(dev.snippets.extract_snippets) for a few queries over this repository.
+
+    python scripts/bench_snippets.py --max-tokens 2000
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dev.snippets import extract_snippets, render_context
+from dev.tokens import count_tokens
+from dev.utils import read_text
+
+QUERIES = {
+    'speed up RepoIndex.get_text': ['dev/index.py', 'dev/utils.py', 'dev/dev.py'],
+    'handle a torn line in LogStore': ['dev/tool/memory/store.py', 'dev/tool/memory/memory.py'],
+    'make summarize_dir save less often': ['dev/tool/summarize.py', 'dev/repomap.py', 'dev/dev.py'],
+    'retry the score call in Select.forward': ['dev/tool/select_files.py', 'dev/rank.py'],
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--max-tokens', type=int, default=2000)
+    args = parser.parse_args()
+    print(f"{'query':42} {'whole':>8} {'snippets':>9} {'ratio':>6} {'ms':>6}")
+    for query, files in QUERIES.items():
+        path2text = {os.path.join(ROOT, f): read_text(os.path.join(ROOT, f)) for f in files}
+        start = time.perf_counter()
+        snippets = extract_snippets(path2text, query, max_tokens=args.max_tokens)
+        ms = (time.perf_counter() - start) * 1000
+        whole, cut = count_tokens(str(path2text)), count_tokens(render_context(snippets))
+        print(f"{query:42} {whole:8} {cut:9} {whole / cut:5.1f}x {ms:6.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the dev package.
+
+Each stage runs in a fresh interpreter so that import costs are measured cold.
+
+    python scripts/bench_startup.py --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (setup, timed statement)
+STAGES = {
+    'import dev': ('', 'import dev'),
+    'import dev.dev': ('', 'import dev.dev'),
+    'Dev()': ('from dev.dev import Dev', 'd = Dev()'),
+    'Dev().index.files': ('from dev.dev import Dev; d = Dev()', 'd.index.files(".")'),
+    'Dev().tools': ('from dev.dev import Dev; d = Dev()', 'd.tools'),
+    'Dev().model': ('from dev.dev import Dev; d = Dev()', 'd.model'),
+}
+
+TEMPLATE = '''
+import time, json
+{setup}
+t = time.perf_counter()
+{stmt}
+print(json.dumps(time.perf_counter() - t))
+'''
+
+def run_stage(setup, stmt):
+    code = TEMPLATE.format(setup=setup, stmt=stmt)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--stages', nargs='*', default=list(STAGES))
+    args = parser.parse_args()
+    for name in args.stages:
+        setup, stmt = STAGES[name]
+        try:
+            times = [run_stage(setup, stmt) * 1000 for _ in range(args.runs)]
+            print(f'{name:<20} min {min(times):8.1f} ms   median {statistics.median(times):8.1f} ms')
+        except RuntimeError as e:
+            print(f'{name:<20} error: {e}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.cache import Cache
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_put_and_get(self):
+        """Test that values round-trip and survive a restart"""
+        cache = Cache(self.path)
+        key = Cache.key('model', [{'role': 'user', 'content': 'hi'}], 0)
+        cache.put(key, {'text': 'hello'})
+        self.assertEqual(Cache(self.path).get(key), {'text': 'hello'})
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual(cache.stats()['hits'], 0)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = Cache(self.path, max_entries=2)
+        cache.put('a', 1)
+        time.sleep(0.01)
+        cache.put('b', 2)
+        time.sleep(0.01)
+        cache.get('a')
+        time.sleep(0.01)
+        cache.put('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl(self):
+        """Test that expired entries are not returned"""
+        cache = Cache(self.path, ttl=0.01)
+        cache.put('a', 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+
+    def test_max_bytes(self):
+        """Test that the size cap is enforced"""
+        cache = Cache(self.path, max_bytes=100)
+        for i in range(10):
+            cache.put(str(i), 'x' * 30)
+        self.assertLessEqual(cache.stats()['bytes'], 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+
+import unittest
+import sys
+import os
+import time
+import threading
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.execute import Executor
+
+class TestExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.log = []
+        self.lock = threading.Lock()
+
+    def fn(self, call):
+        params = call['params']
+        name = params.get('file_path') or params.get('path') or params.get('command')
+        with self.lock:
+            self.log.append(('start', call['fn'], name))
+        time.sleep(0.05)
+        if params.get('fail'):
+            raise ValueError('boom')
+        with self.lock:
+            self.log.append(('end', call['fn'], name))
+        return call['fn']
+
+    def test_independent_files_run_in_parallel(self):
+        """Test that calls on different files overlap"""
+        calls = [{'fn': 'create', 'params': {'file_path': f'/tmp/plan/{i}.py'}} for i in range(4)]
+        start = time.time()
+        results = Executor(self.fn).forward(calls)
+        self.assertLess(time.time() - start, 0.15)
+        self.assertEqual([r['idx'] for r in results], [0, 1, 2, 3])
+        self.assertTrue(all(r['success'] for r in results))
+
+    def test_same_file_runs_in_order(self):
+        """Test that writes to the same file (or inside a deleted dir) keep plan order"""
+        calls = [
+            {'fn': 'create', 'params': {'file_path': '/tmp/plan/a.py'}},
+            {'fn': 'insert', 'params': {'file_path': '/tmp/plan/a.py'}},
+            {'fn': 'delete', 'params': {'path': '/tmp/plan'}},
+        ]
+        Executor(self.fn).forward(calls)
+        self.assertEqual([e[1] for e in self.log], ['create', 'create', 'insert', 'insert', 'delete', 'delete'])
+
+    def test_failures(self):
+        """Test that a failure skips later calls on the same file only"""
+        calls = [
+            {'fn': 'create', 'params': {'file_path': '/tmp/plan/a.py', 'fail': True}},
+            {'fn': 'insert', 'params': {'file_path': '/tmp/plan/a.py'}},
+            {'fn': 'cmd', 'params': {'command': 'ls'}},
+        ]
+        results = Executor(self.fn).forward(calls)
+        self.assertEqual(results[0]['error'], 'boom')
+        self.assertIn('skipped', results[1]['error'])
+        self.assertTrue(results[2]['success'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.ignore import GitIgnore
+from dev.utils import list_files, walk_files
+
+class TestGitIgnore(unittest.TestCase):
+
+    def test_patterns(self):
+        """Test that gitignore patterns, negations, anchors and ** match like git"""
+        ignore = GitIgnore(['# comment', '*.log', '!keep.log', 'build/', '/top.txt', 'docs/**/*.md'], base='/r')
+        self.assertTrue(ignore.match('/r/a/b.log'))
+        self.assertFalse(ignore.match('/r/keep.log'))
+        self.assertTrue(ignore.match('/r/x/build', is_dir=True))
+        self.assertIsNone(ignore.match('/r/x/build'))
+        self.assertTrue(ignore.match('/r/top.txt'))
+        self.assertIsNone(ignore.match('/r/sub/top.txt'))
+        self.assertTrue(ignore.match('/r/docs/a/b/c.md'))
+        self.assertTrue(ignore.match('/r/docs/c.md'))
+
+class TestWalkFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.dir, '.git'))
+        for name in ['a.py', 'a.pyc', 'debug.log', 'pkg/b.py', 'pkg/.gitignore', 'pkg/gen.py',
+                     'build/out.py', '__pycache__/c.py', '.git/config']:
+            self.write(name, 'x' * 10)
+        self.write('.gitignore', '*.log\nbuild/\n')
+        self.write('pkg/.gitignore', 'gen.py\n')
+        self.write('pkg/big.py', 'x' * 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def rel(self, paths):
+        return sorted(os.path.relpath(p, self.dir) for p in paths)
+
+    def test_list_files(self):
+        """Test that list_files honours .gitignore files, ignore patterns and max_size"""
+        files = self.rel(list_files(self.dir, pattern='*.py', ignore_patterns=['__pycache__'], max_size=100))
+        self.assertEqual(files, ['a.py', 'pkg/b.py'])
+        files = self.rel(list_files(self.dir, pattern='*.py', gitignore=False))
+        self.assertIn('build/out.py', files)
+        self.assertIn('pkg/gen.py', files)
+
+    def test_parallel_matches_sequential(self):
+        """Test that the threaded walk lists the same files as the sequential one"""
+        sequential = self.rel(walk_files(self.dir))
+        parallel = self.rel(walk_files(self.dir, max_workers=4))
+        self.assertEqual(sequential, parallel)
+        self.assertNotIn('.git/config', sequential)
+        self.assertEqual(self.rel(walk_files(self.dir, recursive=False)), ['.gitignore', 'a.py', 'a.pyc'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.index import RepoIndex
+
+class TestRepoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.write('a.py', 'print("a")')
+        self.write('pkg/b.py', 'print("b")')
+        self.write('.hidden/c.py', 'print("c")')
+        with open(os.path.join(self.repo_dir, 'blob.bin'), 'wb') as f:
+            f.write(b'\x00\x01\x02')
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.repo_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_files(self):
+        """Test that candidates skip hidden directories and binaries"""
+        index = RepoIndex(cache_dir=self.cache_dir)
+        files = [os.path.relpath(f, self.repo_dir) for f in index.files(self.repo_dir)]
+        self.assertEqual(files, ['a.py', os.path.join('pkg', 'b.py')])
+
+    def test_gitignore(self):
+        """Test that gitignored files are not candidates"""
+        self.write('.gitignore', 'build/\n*.log\n')
+        self.write('build/out.js', 'x')
+        self.write('run.log', 'x')
+        index = RepoIndex(cache_dir=self.cache_dir)
+        files = [os.path.relpath(f, self.repo_dir) for f in index.files(self.repo_dir)]
+        self.assertEqual(files, ['a.py', os.path.join('pkg', 'b.py')])
+
+    def test_hits_and_misses(self):
+        """Test that unchanged files are served from memory"""
+        index = RepoIndex(cache_dir=self.cache_dir)
+        files = index.files(self.repo_dir)
+        index.get_texts(files)
+        index.get_texts(files)
+        stats = index.stats()
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['hits'], 2)
+
+    def test_max_bytes(self):
+        """Test that limits are counted in bytes, cached or not, and clamped at 0"""
+        path = self.write('u.txt', 'é' * 10)
+        index = RepoIndex(cache_dir=self.cache_dir)
+        self.assertEqual(index.get_text(path, max_bytes=4), 'éé')
+        self.assertEqual(index.get_text(path), 'é' * 10)
+        self.assertEqual(index.get_text(path, max_bytes=5), 'éé')
+        self.assertEqual(index.get_text(path, max_bytes=-3), '')
+        other = self.write('v.txt', 'é' * 10)
+        self.assertEqual(index.get_texts([path, other], max_total_bytes=24), {path: 'é' * 10, other: 'éé'})
+        self.assertEqual(index.get_texts([path], max_bytes=2, max_total_bytes=10), {path: 'é'})
+
+    def test_changed_file_is_reread(self):
+        """Test that an edited file is read again"""
+        index = RepoIndex(cache_dir=self.cache_dir)
+        path = os.path.join(self.repo_dir, 'a.py')
+        self.assertEqual(index.get_text(path), 'print("a")')
+        self.write('a.py', 'print("changed")')
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        self.assertEqual(index.get_text(path), 'print("changed")')
+        self.assertEqual(index.stats()['misses'], 2)
+
+    def test_touch_keeps_cache(self):
+        """Test that a new mtime with identical content falls back to the hash"""
+        index = RepoIndex(cache_dir=self.cache_dir)
+        path = os.path.join(self.repo_dir, 'a.py')
+        index.get_text(path)
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        index.get_text(path)
+        stats = index.stats()
+        self.assertEqual(stats['rehashed'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_persistence(self):
+        """Test that the index survives a restart and drops deleted files"""
+        index = RepoIndex(cache_dir=self.cache_dir)
+        index.files(self.repo_dir)
+        os.remove(os.path.join(self.repo_dir, 'a.py'))
+        index = RepoIndex(cache_dir=self.cache_dir)
+        self.assertEqual(len(index.entries), 3)
+        index.files(self.repo_dir)
+        self.assertEqual(len(index.entries), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.model.openrouter.keys import KeyPool
+from dev.model.openrouter.model import OpenRouter
+
+class TestKeyPool(unittest.TestCase):
+
+    def test_least_loaded(self):
+        """Test that requests spread over the keys with the fewest in flight"""
+        pool = KeyPool(['a', 'b'])
+        self.assertEqual({pool.acquire(), pool.acquire()}, {'a', 'b'})
+
+    def test_rate_limited_key_is_skipped(self):
+        """Test that a 429 cools a key down for its Retry-After period"""
+        pool = KeyPool(['a', 'b'])
+        key = pool.acquire()
+        pool.release(key, status=429, retry_after=30)
+        other = pool.acquire()
+        self.assertNotEqual(key, other)
+        pool.release(other)
+        self.assertEqual(pool.acquire(), other)
+        metrics = pool.metrics()
+        self.assertEqual(metrics['rate_limited'], 1)
+        self.assertEqual(metrics['healthy'], 1)
+
+    def test_backoff_and_recovery(self):
+        """Test exponential backoff and that a cooled-down key is used again"""
+        pool = KeyPool(['a'], base_backoff=0.01)
+        pool.release(pool.acquire(), status=503)
+        pool.release(pool.acquire(), status=503)
+        self.assertAlmostEqual(pool.metrics()['backoff'], 0.03)
+        start = time.time()
+        self.assertEqual(pool.acquire(), 'a')
+        self.assertLess(time.time() - start, 1)
+
+    def test_unauthorized_key_fails_over(self):
+        """Test that a 401 takes a key out of rotation and the request is retried on another key"""
+        model = OpenRouter.__new__(OpenRouter)
+        model.max_retries = 2
+        model.key_pool = KeyPool(['bad', 'good'])
+        model.error_status = lambda e: (401, None)
+        def create(key, **params):
+            if key == 'bad':
+                raise ValueError('unauthorized')
+            return 'ok'
+        model.get_client = lambda key: type('Client', (), {'chat': type('Chat', (), {'completions': type('Completions', (), {
+            'create': lambda self, **params: create(key, **params)})()})()})()
+        for _ in range(3):
+            self.assertEqual(model.create(stream=False), 'ok')
+        metrics = model.key_pool.metrics()
+        self.assertEqual(metrics['unauthorized'], 1)
+        self.assertEqual(metrics['healthy'], 1)
+        # with no healthy key left the error is raised instead of waiting out the cooldown
+        model.key_pool = KeyPool(['bad'])
+        with self.assertRaises(ValueError):
+            model.create(stream=False)
+
+    def test_retry_after(self):
+        """Test Retry-After parsing"""
+        self.assertEqual(KeyPool.retry_after({'retry-after': '2'}), 2.0)
+        self.assertIsNone(KeyPool.retry_after({}))
+        self.assertEqual(KeyPool.retry_after({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'}), 0.0)
+
+    def test_stream_holds_key(self):
+        """Test that a streamed request keeps its key in flight until the stream is closed"""
+        model = OpenRouter.__new__(OpenRouter)
+        model.max_retries = 0
+        model.key_pool = KeyPool(['a', 'b'])
+        completions = type('Completions', (), {'create': lambda self, **params: iter(['x', 'y'])})()
+        model.get_client = lambda key: type('Client', (), {'chat': type('Chat', (), {'completions': completions})()})()
+        stream = model.create(stream=True)
+        self.assertEqual(next(stream), 'x')
+        self.assertEqual(model.key_pool.metrics()['inflight'], 1)
+        # the next request goes to the other key
+        other = model.create(stream=True)
+        next(other)
+        self.assertEqual({s['inflight'] for s in model.key_pool.key2state.values()}, {1})
+        stream.close()
+        self.assertEqual(list(other), ['y'])
+        self.assertEqual(model.key_pool.metrics()['inflight'], 0)
+        # non-streamed requests release their key right away
+        model.create(stream=False)
+        self.assertEqual(model.key_pool.metrics()['inflight'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.tool.memory.store import get_store, LogStore, ShortTermStore
+from dev.tool.memory.vectors import VectorIndex, np
+
+def record(data, timestamp):
+    return {'data': data, 'timestamp': timestamp, 'metadata': {'key': str(data)}}
+
+class TestStores(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_backends(self):
+        """Test that every backend supports put, get, delete, keys and range scans"""
+        for backend in ['file', 'log', 'sqlite']:
+            store = get_store(backend, os.path.join(self.dir, backend))
+            store.put_many((f'k{i}', record(i, float(i))) for i in range(10))
+            store.put('k3', record('three', 3.0))
+            self.assertTrue(store.delete('k5'))
+            self.assertFalse(store.delete('k5'))
+            self.assertEqual(store.get('k3')['data'], 'three', backend)
+            self.assertIsNone(store.get('k5'))
+            self.assertEqual(sorted(store.keys()), sorted(f'k{i}' for i in range(10) if i != 5))
+            self.assertEqual([k for k, _ in store.scan(2.0, 6.0)], ['k2', 'k3', 'k4', 'k6'], backend)
+            store.close()
+
+    def test_log_reopen_and_compact(self):
+        """Test that the log compacts, reopens and ignores a torn last line"""
+        store = LogStore(self.dir, min_compact=10)
+        for i in range(30):
+            store.put('same', record(i, float(i)))
+        self.assertLess(store.lines, 30)  # compacted along the way
+        store.put('other', record('x', 100.0))
+        store.close()
+        # a torn write at the end of the log is ignored
+        with open(store.log_path, 'ab') as f:
+            f.write(b'{"key": "torn"')
+        store = LogStore(self.dir)
+        self.assertEqual(store.get('same')['data'], 29)
+        self.assertEqual(sorted(store.keys()), ['other', 'same'])
+        store.close()
+
+    def test_log_shared_between_instances(self):
+        """Test that instances sharing a log see each other's writes and compactions"""
+        a = LogStore(self.dir, min_compact=10)
+        b = LogStore(self.dir, min_compact=10)
+        a.put('x', record(1, 1.0))
+        self.assertEqual(b.get('x')['data'], 1)
+        # a compacts into a new file, b must write to that file rather than the replaced one
+        for i in range(30):
+            a.put('same', record(i, float(i)))
+        b.put('y', record(2, 2.0))
+        b.delete('x')
+        self.assertEqual(sorted(a.keys()), ['same', 'y'])
+        a.close()
+        b.close()
+        store = LogStore(self.dir)
+        self.assertEqual(sorted(store.keys()), ['same', 'y'])
+        self.assertEqual(store.get('same')['data'], 29)
+        store.close()
+
+    def test_log_imports_files(self):
+        """Test that file-per-key memories are imported on first open"""
+        with open(os.path.join(self.dir, 'a_b.json'), 'w') as f:
+            json.dump({'data': 1, 'timestamp': 1.0, 'metadata': {'key': 'a/b'}}, f)
+        store = LogStore(self.dir)
+        self.assertEqual(store.get('a/b')['data'], 1)
+        store.close()
+
+class TestShortTermStore(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        """Test that the least recently used item is evicted at capacity"""
+        store = ShortTermStore(capacity=3)
+        for key in 'abc':
+            store.put(key, key.upper())
+        self.assertEqual(store.get('a'), 'A')  # a is now the most recently used
+        store.put('d', 'D')
+        self.assertEqual(sorted(store.keys()), ['a', 'c', 'd'])
+        store.put('a', 'A2')  # updating an existing key never evicts
+        self.assertEqual(len(store), 3)
+
+    def test_expiry(self):
+        """Test that items expire ttl seconds after their last access"""
+        store = ShortTermStore(capacity=10, default_ttl=10)
+        store.put('short', 1, ttl=0.5)
+        store.put('long', 2)
+        now = store.entries['short']['timestamp']
+        self.assertEqual(store.expire(now + 0.1), 0)
+        self.assertEqual(store.expire(now + 1), 1)
+        self.assertNotIn('short', store)
+        # repeated gets reschedule the expiry without growing the heap unboundedly
+        for _ in range(1000):
+            store.get('long')
+        self.assertLess(len(store.heap), 100)
+        self.assertEqual(store.expire(now + 5), 0)
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_search_and_sync(self):
+        """Test that the vector index finds memories and syncs with the store after changes"""
+        store = LogStore(self.dir)
+        store.put_many([('deploy', record('how to deploy the docker container', 1.0)),
+                        ('pasta', record('recipe for tomato pasta sauce', 2.0)),
+                        ('tests', record('run the unit tests with pytest', 3.0))])
+        index = VectorIndex(self.dir, dim=256)
+        self.assertEqual(index.sync(store)['added'], 3)
+        self.assertEqual(index.search('docker deploy', k=1)[0][0], 'deploy')
+        # changed and deleted memories are picked up on the next load
+        store.put('pasta', record('pytest fixtures and unit tests', 4.0))
+        store.delete('tests')
+        index = VectorIndex(self.dir, dim=256, mmap=True)
+        self.assertEqual(index.sync(store)['added'], 1)
+        results = index.search('unit tests pytest', k=5)
+        self.assertEqual([key for key, _ in results][:1], ['pasta'])
+        self.assertEqual(len(results), 2)
+        index.remove('pasta')
+        self.assertEqual([key for key, _ in index.search('pytest', k=5)], ['deploy'])
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+
+import unittest
+import sys
+import os
+import json
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.parse import StreamParser
+
+class TestStreamParser(unittest.TestCase):
+
+    calls = [
+        {'fn': 'dev.tool.create_file', 'params': {'file_path': 'a.py', 'content': 'x = "[}\\" ]"\n'}},
+        {'fn': 'dev.tool.delete_file', 'params': {'file_path': 'b.py'}},
+    ]
+
+    def stream(self, size):
+        text = 'plan: <START_JSON>\n' + json.dumps(self.calls, indent=2) + '\n</END_JSON> done'
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def test_elements_stream_as_they_complete(self):
+        """Test that each call is returned by the chunk that completes it"""
+        for size in [1, 5, 1000]:
+            parser = StreamParser()
+            completed = []
+            for chunk in self.stream(size):
+                items = parser.feed(chunk)
+                if items:
+                    completed.append((len(parser.text), items))
+            self.assertEqual([i for _, items in completed for i in items], self.calls)
+            self.assertEqual(parser.close(), self.calls)
+        # with small chunks the first call is available before the stream ends
+        parser = StreamParser()
+        first = next(len(parser.text) for chunk in self.stream(1) if parser.feed(chunk))
+        second = len(json.dumps(self.calls[1], indent=2))
+        self.assertLess(first, len(''.join(self.stream(1))) - second)
+
+    def test_unterminated_fallback(self):
+        """Test that close falls back to parsing the whole block"""
+        parser = StreamParser()
+        parser.feed('<START_JSON>[{"fn": "a", "params": {}}, 1')
+        with self.assertRaises(json.JSONDecodeError):
+            parser.close()
+        # a payload the streaming parser cannot split (not an array) is parsed whole
+        parser = StreamParser()
+        self.assertEqual(parser.feed('<START_JSON> {"fn": "a", "params": {"x": [1]}}</END_JSON>'), [])
+        self.assertEqual(parser.close(), [{'fn': 'a', 'params': {'x': [1]}}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.rank import tokenize, BM25, Ranker, HashedVectors, np
+
+class TestRank(unittest.TestCase):
+
+    docs = [
+        'dev/tool/memory/memory.py class Memory short term long term',
+        'dev/model/openrouter/model.py class OpenRouter chat completions',
+        'dev/tool/select_files.py class Select rank options by relevance',
+    ]
+
+    def test_tokenize(self):
+        """Test that paths, snake_case and camelCase are split"""
+        self.assertEqual(tokenize('dev/select_files.py getText'), ['dev', 'select', 'files', 'py', 'get', 'text'])
+
+    def test_bm25(self):
+        """Test that BM25 scores matching documents above the rest"""
+        scores = BM25(self.docs).scores('memory')
+        self.assertGreater(scores[0], 0)
+        self.assertEqual(scores[1], 0)
+
+    def test_ranker_top_k(self):
+        """Test that the ranker returns the best k documents first"""
+        ranked = Ranker().forward('openrouter model', self.docs, k=2)
+        self.assertEqual(len(ranked), 2)
+        self.assertEqual(ranked[0][0], 1)
+
+    def test_bm25_reuse(self):
+        """Test that the BM25 index is reused while the keys are unchanged"""
+        ranker = Ranker(vectors=False)
+        keys = [('a', 1), ('b', 1), ('c', 1)]
+        first = ranker.forward('openrouter model', self.docs, keys=keys)
+        index = ranker.index[1]
+        self.assertEqual(ranker.forward('openrouter model', self.docs, keys=list(keys)), first)
+        self.assertIs(ranker.index[1], index)
+        # a changed key rebuilds the index, reusing the token counts of the other documents
+        counts = ranker.term_cache[keys[0]]
+        ranker.forward('openrouter model', self.docs, keys=keys[:2] + [('c', 2)])
+        self.assertIsNot(ranker.index[1], index)
+        self.assertIs(ranker.term_cache[keys[0]], counts)
+        # documents without keys are never cached
+        ranker.forward('openrouter model', self.docs)
+        self.assertIsNone(ranker.index)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_vector_cache(self):
+        """Test that vectors of keyed documents are reused and the cache is bounded"""
+        ranker = Ranker(cache_size=2)
+        keys = [('a', 1), ('b', 1), ('c', 1)]
+        ranker.forward('memory', self.docs, keys=keys)
+        self.assertEqual(len(ranker.cache), 2)
+        vector = ranker.cache[(keys[2], 1024, 3)]
+        vectors = HashedVectors(self.docs[2:], keys=keys[2:], cache=ranker.cache)
+        self.assertIs(ranker.cache[(keys[2], 1024, 3)], vector)
+        self.assertEqual(vectors.matrix.shape, (1, 1024))
+
+if __name__ == '__main__':
+    unittest.main()
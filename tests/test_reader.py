@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.utils import get_text, iter_chunks, iter_lines, read_text, iter_texts
+
+class TestReader(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.text = ''.join(f'line {i} é\n' for i in range(1000))
+        self.path = self.write('big.txt', self.text)
+        self.write('small.txt', 'hello')
+        self.write('empty.txt', '')
+        with open(os.path.join(self.dir, 'blob.bin'), 'wb') as f:
+            f.write(b'\x00\x01\x02' * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_chunks_roundtrip(self):
+        """Test that chunked reads decode characters split across chunk boundaries"""
+        # chunk boundaries fall inside the two-byte 'é'
+        self.assertEqual(''.join(iter_chunks(self.path, chunk_size=7)), self.text)
+        self.assertEqual(read_text(os.path.join(self.dir, 'empty.txt')), '')
+
+    def test_max_bytes(self):
+        """Test that read_text stops at max_bytes without a broken character"""
+        text = read_text(self.path, max_bytes=100)
+        self.assertTrue(self.text.startswith(text))
+        self.assertLessEqual(len(text.encode('utf-8')), 100)
+        self.assertNotIn('�', text)
+
+    def test_lines(self):
+        """Test that iter_lines returns a numbered line range"""
+        lines = list(iter_lines(self.path, start=10, end=13))
+        self.assertEqual([n for n, _ in lines], [10, 11, 12])
+        self.assertEqual(lines[0][1], 'line 10 é\n')
+
+    def test_directory_budget(self):
+        """Test that directory reads skip binaries and respect the byte budgets"""
+        path2text = get_text(self.dir)
+        self.assertNotIn(os.path.join(self.dir, 'blob.bin'), path2text)
+        self.assertEqual(path2text[os.path.join(self.dir, 'small.txt')], 'hello')
+        texts = dict(iter_texts(self.dir, max_bytes=50, max_total_bytes=60))
+        self.assertTrue(all(len(t.encode('utf-8')) <= 50 for t in texts.values()))
+        self.assertLessEqual(sum(len(t.encode('utf-8')) for t in texts.values()), 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.repomap import RepoMap
+
+class TestRepoMap(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.a = self.write('a.py', 'def add(a, b): return a + b')
+        self.b = self.write('b.py', 'def sub(a, b): return a - b')
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.repo_dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_incremental(self):
+        """Test that only changed files are stale and maps are kept per query"""
+        repo_map = RepoMap(self.repo_dir, self.cache_dir)
+        self.assertEqual(repo_map.stale([self.a, self.b]), [self.a, self.b])
+        repo_map.update(self.a, [{'obj': 'add', 'desc': 'adds two numbers'}])
+        repo_map.update(self.b, [{'obj': 'sub', 'desc': 'subtracts'}])
+        repo_map.save()
+        time.sleep(0.01)
+        self.write('b.py', 'def sub(a, b):\n    return a - b\n')
+        repo_map = RepoMap(self.repo_dir, self.cache_dir)
+        self.assertEqual(repo_map.stale([self.a, self.b]), [self.b])
+        self.assertEqual(repo_map.text(self.a), 'add: adds two numbers')
+        self.assertEqual(repo_map.prune([self.a]), 1)
+        self.assertEqual(list(repo_map.render()), [self.a])
+        self.assertEqual(repo_map.render(budget=1), {})
+        # summaries built for another query are not reused, and saving them keeps the default map
+        other = RepoMap(self.repo_dir, self.cache_dir, query='other')
+        self.assertEqual(other.files, {})
+        other.update(self.b, [{'obj': 'sub', 'desc': 'other'}])
+        other.save()
+        self.assertEqual(RepoMap(self.repo_dir, self.cache_dir).text(self.a), 'add: adds two numbers')
+
+    def test_rank(self):
+        """Test that summaries are ranked by their match with the query"""
+        repo_map = RepoMap(self.repo_dir, self.cache_dir)
+        repo_map.update(self.a, [{'obj': 'add', 'desc': 'adds two numbers'}])
+        repo_map.update(self.b, [{'obj': 'sub', 'desc': 'subtracts two numbers'}])
+        self.assertEqual(repo_map.rank('subtracts numbers'), [self.b, self.a])
+        self.assertEqual(repo_map.rank('adds numbers'), [self.a, self.b])
+        # unmapped (e.g. deleted) paths are dropped
+        self.assertEqual(repo_map.rank('subtracts', [self.a, os.path.join(self.repo_dir, 'c.py')]), [self.a])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.search import ContentIndex, literals, trigrams
+
+class TestContentIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.write('a.py', 'def add(a, b):\n    return a + b\n')
+        self.write('b.py', 'def sub(a, b):\n    return a - b\n')
+        self.write('pkg/c.py', 'class Adder:\n    pass\n')
+        with open(os.path.join(self.repo_dir, 'blob.bin'), 'wb') as f:
+            f.write(b'\x00def add\x00')
+        self.index = ContentIndex(cache_dir=self.cache_dir, max_workers=2)
+
+    def tearDown(self):
+        self.index.conn.close()
+        shutil.rmtree(self.repo_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.repo_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def search(self, query, **kwargs):
+        return sorted(os.path.relpath(p, self.repo_dir) for p in self.index.search(self.repo_dir, query, **kwargs))
+
+    def test_literals(self):
+        """Test that literal runs are extracted from regexes and trigrams are case-folded"""
+        self.assertEqual(literals(r'def \w+\(self'), ['def ', '(self'])
+        self.assertEqual(literals('a|bcd'), [])
+        self.assertIn('add', trigrams('ADD'))
+
+    def test_cold_scan_matches_index(self):
+        """Test that a cold query scans while the index warms, and the warm index gives the same result"""
+        cold = self.search('def add')
+        self.index.warming.join()
+        self.assertEqual(self.index.stats()['scans'], 1)
+        self.assertEqual(self.index.stats()['files'], 4)
+        warm = self.search('def add')
+        self.assertEqual(cold, ['a.py'])
+        self.assertEqual(warm, cold)
+        self.assertEqual(self.index.stats()['scans'], 1)
+
+    def test_regex_and_updates(self):
+        """Test regex queries and that edits and deletions are picked up"""
+        self.assertEqual(self.search(r'def \w+\(a', regex=True, background=False), ['a.py', 'b.py'])
+        self.assertEqual(self.search('Adder', background=False), ['pkg/c.py'])
+        time.sleep(0.01)
+        self.write('b.py', 'x = Adder()\n')
+        os.remove(os.path.join(self.repo_dir, 'pkg/c.py'))
+        self.assertEqual(self.search('Adder', background=False), ['b.py'])
+        self.assertEqual(self.index.stats()['files'], 3)
+
+    def test_long_query_and_unreadable(self):
+        """Test that long queries work and unreadable files are not re-read every query"""
+        long_text = ' '.join(f'word{i}' for i in range(3000))
+        self.write('long.txt', long_text + '\n')
+        self.assertEqual(self.search(long_text, background=False), ['long.txt'])
+        # files that cannot be read are recorded, not re-read on every query
+        unreadable = os.path.join(self.repo_dir, 'pkg')
+        self.index.update([unreadable])
+        self.assertEqual(self.index.stale([unreadable]), [])
+        self.assertEqual(self.index.candidates([unreadable], trigrams('Adder')), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+import subprocess
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.snippets import blocks, merge, extract, extract_snippets, changed_lines
+
+SOURCE = '''import os
+
+class Store:
+    """A store."""
+
+    def put(self, key, value):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+def unrelated(x):
+    return x * 2
+
+def helper():
+    return os.getcwd()
+'''
+
+class TestSnippets(unittest.TestCase):
+
+    def test_blocks(self):
+        """Test that Python files split into defs and other files into windows"""
+        spans = blocks(SOURCE, 'store.py')
+        self.assertEqual([name for start, end, name in spans], ['', 'Store', 'Store.put', 'Store.get', 'unrelated', 'helper'])
+        start, end, name = spans[2]
+        self.assertEqual(SOURCE.splitlines()[start:end], ['    def put(self, key, value):', '        self.data[key] = value'])
+        # other files are split into windows
+        self.assertEqual(blocks('a\n' * 90, 'notes.txt', window=40), [(0, 40, ''), (40, 80, ''), (80, 90, '')])
+
+    def test_merge(self):
+        """Test that overlapping and adjacent ranges are merged"""
+        self.assertEqual(merge([(10, 20), (0, 5), (15, 30), (31, 40), (50, 60)]), [(0, 5), (10, 40), (50, 60)])
+
+    def test_extract(self):
+        """Test that matching blocks, blocks near changes and the outline fallback are rendered"""
+        text = extract(SOURCE, 'fix Store.get', 'store.py')
+        self.assertIn('@@ 9-10 @@', text)
+        self.assertIn('def get', text)
+        self.assertNotIn('def unrelated', text)
+        # blocks near a change are included even without a lexical match
+        text = extract(SOURCE, 'fix Store.get', 'store.py', changed=[(12, 13)], diff_lines=0)
+        self.assertIn('def unrelated', text)
+        # nothing matches: fall back to the outline
+        self.assertIn('@@ outline @@', extract(SOURCE, 'zzz', 'store.py'))
+
+    def test_small_files_whole(self):
+        """Test that small files are kept whole and large ones cut down"""
+        filler = ''.join(f'\ndef f{i}(x):\n    return x + {i}\n' for i in range(100))
+        path2text = {'a.py': 'x = 1\n', 'b.py': SOURCE + filler}
+        snippets = extract_snippets(path2text, 'helper', min_tokens=50)
+        self.assertEqual(snippets['a.py'], 'x = 1\n')
+        self.assertLess(len(snippets['b.py']), len(path2text['b.py']) / 5)
+
+    def test_changed_lines(self):
+        """Test that uncommitted changes are read from git diff"""
+        repo = tempfile.mkdtemp()
+        try:
+            run = lambda *args: subprocess.run(['git', *args], cwd=repo, capture_output=True)
+            if run('init', '-q').returncode != 0:
+                self.skipTest('git is not available')
+            path = os.path.join(repo, 'a.py')
+            with open(path, 'w') as f:
+                f.write('a\nb\nc\nd\n')
+            run('add', 'a.py')
+            run('-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-qm', 'init')
+            with open(path, 'w') as f:
+                f.write('a\nB\nc\nd\ne\n')
+            self.assertEqual(changed_lines(repo), {os.path.realpath(path): [(1, 2), (4, 5)]})
+        finally:
+            shutil.rmtree(repo)
+
+if __name__ == '__main__':
+    unittest.main()
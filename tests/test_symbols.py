@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.symbols import SymbolIndex, parse_symbols
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.write('store.py', 'import json\n\nclass Store:\n    def put(self, key):\n        print(key)\n        return json.dumps(key)\n')
+        self.write('app.py', 'from store import Store\n\ndef main():\n    Store().put(1)\n    print(1)\n')
+        self.write('other.py', 'def helper():\n    print(2)\n')
+        self.write('broken.py', 'def (:\n')
+        self.paths = [os.path.join(self.repo_dir, f) for f in ['store.py', 'app.py', 'other.py', 'broken.py']]
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.repo_dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def rel(self, hits):
+        return [os.path.basename(path) for path, _ in hits]
+
+    def test_parse(self):
+        """Test that definitions, imports and references are extracted"""
+        symbols = parse_symbols('import os.path as p\nclass A:\n    def f(self):\n        os.getcwd()\n')
+        self.assertEqual(symbols['defines'], ['A', 'A.f', 'f'])
+        self.assertIn('os.path', symbols['imports'])
+        self.assertIn('getcwd', symbols['references'])
+
+    def test_identifiers(self):
+        """Test that only code-like words count as identifiers"""
+        self.assertEqual(SymbolIndex.identifiers('update the README with install steps'), [])
+        self.assertEqual(SymbolIndex.identifiers('fix `put` in Store.get_all'), ['put', 'Store.get_all', 'Store', 'get_all'])
+        self.assertEqual(SymbolIndex.identifiers('speed up RepoIndex and list_files'), ['RepoIndex', 'list_files'])
+
+    def test_lookup(self):
+        """Test that lookups rank definitions first, skip common symbols and follow edits"""
+        index = SymbolIndex(cache_dir=self.cache_dir)
+        self.assertEqual(self.rel(index.lookup('speed up Store.put', self.paths)), ['store.py', 'app.py'])
+        # 'print' is used by most files, so it does not narrow anything down
+        self.assertEqual(index.lookup('fix the `print`', self.paths), [])
+        self.assertEqual(index.update(self.paths), 0)
+        time.sleep(0.01)
+        self.write('other.py', 'def helper():\n    return Store\n')
+        index = SymbolIndex(cache_dir=self.cache_dir)
+        self.assertEqual(index.update(self.paths), 1)
+        self.assertEqual(self.rel(index.lookup('`helper`', self.paths)), ['other.py'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import dev
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev.tokens import count_tokens, truncate_tokens, plan_context, chunk_text
+
+class TestTokens(unittest.TestCase):
+
+    def test_count_tokens(self):
+        """Test that token counts grow with the text"""
+        self.assertEqual(count_tokens(''), 0)
+        self.assertGreater(count_tokens('def add(a, b): return a + b'), 5)
+        self.assertGreater(count_tokens('word ' * 100), count_tokens('word ' * 10))
+
+    def test_truncate_tokens(self):
+        """Test that truncated text fits the budget"""
+        text = '\n'.join(f'line {i} with some words' for i in range(1000))
+        truncated = truncate_tokens(text, 100)
+        self.assertLessEqual(count_tokens(truncated), 100)
+        self.assertIn('truncated', truncated)
+
+    def test_plan_context(self):
+        """Test that files are packed in order, then truncated, then dropped"""
+        small = 'x = 1\n' * 10
+        large = 'y = 2\n' * 2000
+        plan = plan_context({'a.py': small, 'b.py': large, 'c.py': small}, budget=500, min_tokens=50)
+        actions = [p['action'] for p in plan['plan']]
+        self.assertEqual(actions, ['full', 'truncated', 'dropped'])
+        self.assertLessEqual(plan['used'], 500)
+        self.assertEqual(list(plan['context']), ['a.py', 'b.py'])
+
+    def test_chunk_text_stable(self):
+        """Test that an edit only changes the chunks around it"""
+        defs = [f'def f{i}(x):\n' + ''.join(f'    x = x + {j}  # step {j} of f{i}\n' for j in range(i % 7 + 2)) + '    return x\n\n' for i in range(120)]
+        before = chunk_text(''.join(defs), 'a.py', max_tokens=300)
+        self.assertGreater(len(before), 5)
+        self.assertEqual(''.join(text for _, text in before), ''.join(defs))
+        self.assertTrue(all(count_tokens(text) <= 300 for _, text in before))
+        defs[60] = defs[60].replace('    return x\n', '    x = x * 2\n    x = x - 1\n    return x\n')
+        after = chunk_text(''.join(defs), 'a.py', max_tokens=300)
+        self.assertEqual(''.join(text for _, text in after), ''.join(defs))
+        changed = set(text for _, text in after) - set(text for _, text in before)
+        self.assertLessEqual(len(changed), 2)
+        self.assertTrue(any('f60(' in text for text in changed))
+
+if __name__ == '__main__':
+    unittest.main()